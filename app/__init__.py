@@ -1,24 +1,137 @@
-from flask import Flask
+from flask import Flask, jsonify
+from functools import lru_cache
 from os import getenv
-from flasgger import Swagger
+import threading
+from werkzeug.exceptions import HTTPException
 
 from .config import DevelopmentConfig, ProductionConfig, TestingConfig
 from .extensions import db, mail, scheduler
 
+# Database URLs whose tables have already been created by this process
+_TABLES_READY = set()
+
 
 def create_app():
     app = Flask(__name__)
     
     # Load configuration based on environment
     env = getenv('FLASK_ENV', 'development')
+    app.config.update(_config_for(env))
+    
+    # Match routes with or without a trailing slash instead of redirecting. Rules
+    # take this default when added, so it is set before Swagger or any blueprint
+    app.url_map.strict_slashes = False
+    
+    # jsonify / request.get_json go through orjson
+    from .api.responses import OrjsonProvider
+    app.json = OrjsonProvider(app)
+    
+    if app.config['LOG_JSON']:
+        from .utils.log_format import configure_json_logging
+        configure_json_logging()
+    
+    # Swagger/OpenAPI docs are optional; flasgger is only imported when enabled
+    if app.config['ENABLE_SWAGGER']:
+        _init_swagger(app)
+    
+    # Initialize extensions
+    db.init_app(app)
+    if app.config['ENABLE_MAIL']:
+        mail.init_app(app)
+        # Resolved once so each alert email doesn't go back to config for it
+        app.extensions['alert_mail_sender'] = app.config.get('MAIL_USERNAME', 'noreply@cryptotracker.com')
+    
+    # Register blueprints
+    from .api import alerts_blueprint
+    from .api.health import health_bp
+    app.register_blueprint(health_bp)
+    app.register_blueprint(alerts_blueprint, url_prefix='/api')
+    
+    @app.errorhandler(Exception)
+    def handle_unexpected_error(e):
+        """Log unhandled exceptions once and return a generic JSON 500."""
+        if isinstance(e, HTTPException):
+            return e
+        app.logger.exception("Unhandled exception")
+        return jsonify({"error": "Internal server error"}), 500
+    
+    # Table creation and scheduler start run on the first request rather than here,
+    # so CLI commands and test fixtures that build an app don't pay for them
+    _register_startup_hook(app)
+    
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create any missing database tables."""
+        db.create_all()
+    
+    # Build the URL matcher once now that every rule is registered, rather than
+    # lazily on the first request
+    app.url_map.update()
+    
+    return app
+
+
+@lru_cache(maxsize=4)
+def _config_for(env: str) -> dict:
+    """Materialize the uppercase settings of the config class for ``env`` once."""
     if env == 'production':
-        app.config.from_object(ProductionConfig)
+        config_class = ProductionConfig
     elif env == 'testing':
-        app.config.from_object(TestingConfig)
+        config_class = TestingConfig
     else:
-        app.config.from_object(DevelopmentConfig)
+        config_class = DevelopmentConfig
+    return {key: getattr(config_class, key) for key in dir(config_class) if key.isupper()}
+
+
+def _register_startup_hook(app):
+    """Run one-time startup work before the first request is handled."""
+    lock = threading.Lock()
+    started = False
     
-    # Configure Swagger/OpenAPI
+    @app.before_request
+    def _startup_once():
+        nonlocal started
+        if started:
+            return
+        with lock:
+            if started:
+                return
+            # Create tables (skipped when schema is managed out-of-band)
+            if app.config['RUN_CREATE_ALL']:
+                _prepare_tables()
+            # Start scheduler for daily price checks (disabled under tests)
+            if app.config['ENABLE_SCHEDULER']:
+                _init_scheduler(app)
+            started = True
+
+
+def _prepare_tables():
+    """Run db.create_all() once per database URL for this process."""
+    url = str(db.engine.url)
+    if url in _TABLES_READY:
+        return
+    db.create_all()
+    _TABLES_READY.add(url)
+
+
+def _init_scheduler(app):
+    """Register the daily alert check and start the background scheduler."""
+    if scheduler.running:
+        return
+    from .services.alert_service import check_all_alerts
+    # replace_existing keeps repeated create_app calls from duplicating the job;
+    # coalesce/max_instances collapse missed or overlapping runs into one
+    scheduler.add_job(
+        check_all_alerts, 'cron', hour=0, minute=0, id='check_alerts_daily', args=[app],
+        replace_existing=True, coalesce=True, max_instances=1
+    )
+    scheduler.start()
+
+
+def _init_swagger(app):
+    """Register flasgger's spec and UI routes on the app."""
+    from flasgger import Swagger
+
     swagger_template = {
         "swagger": "2.0",
         "info": {
@@ -46,7 +159,7 @@ def create_app():
             }
         ]
     }
-    
+
     swagger_config = {
         "headers": [],
         "specs": [
@@ -61,27 +174,5 @@ def create_app():
         "swagger_ui": True,
         "specs_route": "/apidocs/"
     }
-    
+
     Swagger(app, template=swagger_template, config=swagger_config)
-    
-    # Initialize extensions
-    db.init_app(app)
-    mail.init_app(app)
-    
-    # Register blueprints
-    from .api import alerts_blueprint
-    from .api.health import health_bp
-    app.register_blueprint(health_bp)
-    app.register_blueprint(alerts_blueprint, url_prefix='/api')
-    
-    # Create tables
-    with app.app_context():
-        db.create_all()
-        
-        # Start scheduler for daily price checks (only in production/development)
-        if not app.config.get('TESTING', False) and not scheduler.running:
-            from .services.alert_service import check_all_alerts
-            scheduler.add_job(check_all_alerts, 'cron', hour=0, minute=0, id='check_alerts_daily', args=[app])
-            scheduler.start()
-    
-    return app
\ No newline at end of file
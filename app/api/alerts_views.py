@@ -0,0 +1,395 @@
+from flask import request, g, current_app
+from app.api.responses import json_list_stream_response, json_response, raw_json_response
+from app.api.schemas import AlertOut, SetAlertRequest
+from app.services.alert_service import (
+    create_alert, get_user_alerts_rows, deactivate_alert, check_alert_by_id,
+    get_cached_user_alerts_body, cache_user_alerts_body, user_alerts_cache_generation
+)
+from app.services.coin_service import get_coin_price, peek_coin_price
+from app.middleware.auth_middleware import require_auth
+from app.utils.resilience import retry, circuit_breaker
+from app.utils.background import submit_task
+import logging
+import orjson
+
+# View functions for the alerts blueprint. They are registered by import path
+# in app/api/alerts.py and only imported on the first request.
+
+logger = logging.getLogger(__name__)
+
+
+# Static error bodies, serialized once at import
+_ERR_MISSING = orjson.dumps({"error": "Missing required fields: coin_id, threshold_price"})
+_ERR_NONPOSITIVE = orjson.dumps({"error": "threshold_price must be greater than 0"})
+
+
+def _serialize_alert(a) -> AlertOut:
+    """Build the public JSON representation of an alert.
+
+    ``created_at`` is left as a datetime; orjson emits it in ISO 8601 form.
+    """
+    return AlertOut(a.id, a.coin_id, a.threshold_price, a.is_active, a.created_at)
+
+
+# DEMONSTRATION: Simple decorator usage example
+@retry(max_attempts=2, delay=1)
+@circuit_breaker(failure_threshold=3, recovery_timeout=30, name="demo_service")
+def demo_resilient_call(coin_id: str) -> dict:
+    """
+    Simple demonstration of @retry and @circuit_breaker decorators.
+    
+    This function shows:
+    1. @retry: Automatically retries failed calls up to 2 times with 1 second delays
+    2. @circuit_breaker: Opens circuit after 3 failures, recovers after 30 seconds
+    
+    The decorators are stacked (retry is innermost, circuit_breaker is outermost).
+    This means: request → circuit_breaker → retry → actual function call
+    """
+    price = get_coin_price(coin_id)
+    if price is None:
+        raise Exception(f"Failed to fetch price for {coin_id}")
+    return {"coin_id": coin_id, "price": price}
+
+
+@require_auth
+def set_alert():
+    """
+    Set a custom price alert for a coin.
+    ---
+    tags:
+      - Alerts
+    security:
+      - BearerAuth: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            coin_id:
+              type: string
+              description: The ID of the cryptocurrency
+              example: "bitcoin"
+            threshold_price:
+              type: number
+              format: float
+              description: The price threshold to trigger the alert
+              example: 50000
+          required:
+            - coin_id
+            - threshold_price
+    responses:
+      201:
+        description: Alert successfully created
+        schema:
+          type: object
+          properties:
+            id:
+              type: integer
+              example: 1
+            coin_id:
+              type: string
+              example: "bitcoin"
+            threshold_price:
+              type: number
+              format: float
+              example: 50000
+            is_active:
+              type: boolean
+              example: true
+            created_at:
+              type: string
+              format: date-time
+              example: "2026-01-04T12:34:56"
+      400:
+        description: Invalid request data
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: "Missing required fields: coin_id, threshold_price"
+      500:
+        description: Internal server error
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+    """
+    # Decode and validate the raw body in one pass; None means missing or malformed fields
+    req = SetAlertRequest.parse(request.get_data())
+    
+    if req is None:
+        return raw_json_response(_ERR_MISSING, 400)
+    
+    coin_id = req.coin_id
+    threshold_price = req.threshold_price
+    
+    logger.debug("[ALERT] Setting alert: coin_id=%s, threshold_price=%s", coin_id, threshold_price)
+    
+    if threshold_price <= 0:
+        logger.warning("[ALERT] Invalid threshold price: %s", threshold_price)
+        return raw_json_response(_ERR_NONPOSITIVE, 400)
+    
+    # Get user_id and email from auth middleware
+    current_user = g.current_user
+    user_id = current_user['user_id']
+    user_email = current_user.get('username', '')
+    logger.debug("[ALERT] User ID: %s", user_id)
+    
+    if not user_email:
+        logger.error("[ALERT] Could not retrieve user email for user %s", user_id)
+        return json_response({"error": "Could not retrieve user email from user-service"}, 400)
+    
+    alert, _ = create_alert(user_id, user_email, coin_id, threshold_price)
+    logger.info(
+        "[ALERT] Alert created with ID: %s", alert.id,
+        extra={"event": "alert.created", "alert_id": alert.id, "user_id": user_id,
+               "coin_id": coin_id, "threshold": threshold_price}
+    )
+    
+    # Check if alert threshold is already met on a background worker so the
+    # response doesn't wait on the price fetch or email send. A fresh cached
+    # price below the threshold already answers that, so skip the check.
+    cached_price = peek_coin_price(coin_id)
+    if cached_price is not None and cached_price < threshold_price:
+        logger.debug("[ALERT] Cached price %s below threshold - skipping immediate check: alert_id=%s",
+                     cached_price, alert.id)
+    else:
+        logger.debug("[ALERT] Queueing immediate check: alert_id=%s", alert.id)
+        submit_task(current_app._get_current_object(), check_alert_by_id, alert.id, user_email)
+    
+    return json_response(_serialize_alert(alert), 201)
+
+@require_auth
+def get_alerts():
+    """
+    Retrieve all active alerts for the current user.
+    ---
+    tags:
+      - Alerts
+    security:
+      - BearerAuth: []
+    responses:
+      200:
+        description: Successfully retrieved user alerts
+        schema:
+          type: object
+          properties:
+            alerts:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    example: 1
+                  coin_id:
+                    type: string
+                    example: "bitcoin"
+                  threshold_price:
+                    type: number
+                    format: float
+                    example: 50000
+                  is_active:
+                    type: boolean
+                    example: true
+                  created_at:
+                    type: string
+                    format: date-time
+                    example: "2026-01-04T12:34:56"
+      500:
+        description: Internal server error
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+    """
+    user_id = g.current_user['user_id']
+    body = get_cached_user_alerts_body(user_id)
+    if body is not None:
+        logger.debug("[ALERT] Serving cached alerts for user: %s", user_id)
+        return raw_json_response(body, 200)
+    
+    logger.debug("[ALERT] Fetching alerts for user: %s", user_id)
+    generation = user_alerts_cache_generation()
+    # The query runs here so DB errors still surface as a normal error response;
+    # rows are then serialized and sent one partition at a time
+    result = get_user_alerts_rows(user_id)
+    chunks = ([AlertOut(*row) for row in partition] for partition in result.partitions())
+    return json_list_stream_response(
+        "alerts", chunks,
+        on_complete=lambda body: cache_user_alerts_body(user_id, body, generation)
+    )
+
+@require_auth
+def delete_alert(alert_id):
+    """
+    Deactivate an alert by ID.
+    ---
+    tags:
+      - Alerts
+    security:
+      - BearerAuth: []
+    parameters:
+      - in: path
+        name: alert_id
+        type: string
+        required: true
+        description: The ID of the alert to deactivate
+        example: "1"
+    responses:
+      204:
+        description: Alert successfully deactivated (no response body)
+      404:
+        description: Alert not found
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: "Alert not found"
+      500:
+        description: Internal server error
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+    """
+    success = deactivate_alert(alert_id)
+    
+    if not success:
+        logger.warning("[ALERT] Alert not found for deactivation: %s", alert_id,
+                       extra={"event": "alert.not_found", "alert_id": alert_id})
+        return json_response({"error": "Alert not found"}, 404)
+    
+    logger.info("[ALERT] Alert %s deactivated successfully", alert_id,
+                extra={"event": "alert.deactivated", "alert_id": alert_id})
+    return '', 204
+
+def check_alerts():
+    """
+    Internal endpoint called by pricing-service after market data updates.
+    Queues a batch check on all active alerts, which triggers notifications if thresholds are met.
+    Returns immediately; the check runs on a background worker.
+    ---
+    tags:
+      - Alerts
+    responses:
+      202:
+        description: Alert check accepted
+        schema:
+          type: object
+          properties:
+            message:
+              type: string
+              example: "Alert check accepted"
+      500:
+        description: Internal server error
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+    """
+    logger.info("[ALERT] Queueing batch alert check", extra={"event": "alerts.check_queued"})
+    from app.services.alert_service import check_all_alerts
+    app = current_app._get_current_object()
+    submit_task(app, check_all_alerts, app)
+    return json_response({"message": "Alert check accepted"}, 202)
+
+
+
+
+@require_auth
+def test_pricing(coin_id):
+    """
+    Test endpoint to demonstrate circuit breaker and retry patterns.
+    
+    This endpoint helps visualize the resilience decorators in action:
+    - Make requests while pricing service is UP → success
+    - Scale pricing service DOWN → see retry attempts then circuit breaker open
+    - Wait 60 seconds → circuit breaker recovers automatically
+    
+    Use for live demonstrations of fault tolerance patterns.
+    ---
+    tags:
+      - Testing
+    security:
+      - BearerAuth: []
+    parameters:
+      - in: path
+        name: coin_id
+        type: string
+        required: true
+        description: The coin ID to test (e.g., bitcoin, ethereum)
+        example: "bitcoin"
+    responses:
+      200:
+        description: Successfully fetched coin price (service is healthy)
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "success"
+            coin_id:
+              type: string
+              example: "bitcoin"
+            price:
+              type: number
+              format: float
+              example: 42500.50
+      503:
+        description: Pricing service is failing - either retrying or circuit breaker is open
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: "error"
+            error:
+              type: string
+              example: "Circuit breaker is open for 'pricing_service'. Service unavailable."
+    """
+    try:
+        logger.info("[TEST] Testing pricing service with coin_id: %s", coin_id)
+        
+        # Call get_coin_price() which has @retry and @circuit_breaker decorators
+        # If pricing service is down:
+        #   - First 3 requests: @retry will attempt 3 times (with delays)
+        #   - After 5 total failures: @circuit_breaker opens
+        #   - Subsequent requests: fail instantly with circuit breaker error
+        price = get_coin_price(coin_id)
+        
+        logger.info("[TEST] Successfully fetched price for %s: $%s", coin_id, price)
+        return json_response({
+            "status": "success",
+            "coin_id": coin_id,
+            "price": price
+        }, 200)
+        
+    except Exception as e:
+        error_msg = str(e)
+        logger.error("[TEST] Error calling pricing service: %s", error_msg, exc_info=True)
+        
+        # Check if this is a circuit breaker error (circuit is OPEN)
+        if "Circuit" in error_msg and "OPEN" in error_msg:
+            logger.warning("[TEST] Circuit breaker is OPEN - failing fast without retry")
+            return json_response({
+                "status": "error",
+                "error": error_msg,
+                "note": "🔴 CIRCUIT BREAKER OPEN: Service is unavailable. Will automatically recover in 60 seconds."
+            }, 503)
+        else:
+            # Connection errors, timeouts, or retry exhausted (first request hitting a downed service)
+            logger.warning("[TEST] Pricing service unavailable - retry mechanism exhausted: %s", error_msg)
+            return json_response({
+                "status": "error",
+                "error": error_msg,
+                "note": "⚠️ RETRY EXHAUSTED: Service down. Circuit breaker will open after 5 total failures to prevent cascading requests."
+            }, 503)
@@ -0,0 +1,29 @@
+"""Lazily imported view functions (the Flask "LazyView" pattern)."""
+
+from werkzeug.utils import cached_property, import_string
+
+
+class LazyView:
+    # Stands in for a view function given by import path; the module holding
+    # the real view is only imported on the first request (or docs lookup).
+
+    def __init__(self, import_name: str):
+        self.__module__, self.__name__ = import_name.rsplit('.', 1)
+        self.import_name = import_name
+
+    @cached_property
+    def view(self):
+        return import_string(self.import_name)
+
+    @property
+    def __wrapped__(self):
+        # Lets introspection (inspect, flasgger) see through to the real view
+        return self.view
+
+    @property
+    def __doc__(self):
+        # Resolved on demand so flasgger can still read the view's YAML docstring
+        return self.view.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
@@ -0,0 +1,90 @@
+"""JSON response helpers backed by orjson."""
+
+from flask import Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+import orjson
+
+# Swagger specs key responses by int status codes
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def json_response(payload, status: int = 200) -> Response:
+    """Serialize a payload with orjson into a JSON response."""
+    return Response(orjson.dumps(payload), status=status, mimetype='application/json')
+
+
+def raw_json_response(body: bytes, status: int) -> Response:
+    """Wrap an already-serialized JSON body in a response."""
+    return Response(body, status=status, mimetype='application/json')
+
+
+def json_list_stream_response(key: str, chunks, status: int = 200, on_complete=None) -> Response:
+    """Stream ``{"<key>": [...]}`` from an iterable of item lists.
+    
+    Each chunk is serialized and sent as soon as it is produced, so peak memory
+    is bounded by the chunk size rather than the full list.
+    
+    Args:
+        key: Top-level key holding the list
+        chunks: Iterable of lists of items orjson can serialize
+        status: HTTP status code
+        on_complete: Optional callable given the full body once it has been sent
+            (the body is only accumulated when this is set)
+    """
+    def generate():
+        parts = [] if on_complete else None
+        
+        def emit(part):
+            if parts is not None:
+                parts.append(part)
+            return part
+        
+        yield emit(b'{' + orjson.dumps(key) + b':[')
+        separator = b''
+        for chunk in chunks:
+            if chunk:
+                yield emit(separator + b','.join(map(orjson.dumps, chunk)))
+                separator = b','
+        yield emit(b']}')
+        if on_complete:
+            on_complete(b''.join(parts))
+    return Response(stream_with_context(generate()), status=status, mimetype='application/json')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that routes ``jsonify`` and ``request.get_json`` through orjson.
+    
+    Types orjson cannot encode natively fall back to Flask's default handler.
+    ``sort_keys`` and ``compact`` behave as in Flask; orjson output is always
+    compact unless indented. ``dumps`` accepts ``default``, ``sort_keys``,
+    ``indent`` (any truthy indent means two spaces) and compact ``separators``
+    (as passed by Flask's session serializer), and raises TypeError for other
+    ``json.dumps`` arguments rather than ignoring them.
+    """
+    
+    def dumps(self, obj, **kwargs) -> str:
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return self._dumpb(obj, **kwargs).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = self._dumpb(obj, sort_keys=self.sort_keys, indent=indent)
+        return self._app.response_class(body + b'\n' if indent else body, mimetype=self.mimetype)
+    
+    def _dumpb(self, obj, sort_keys: bool = False, indent=None, default=None, **kwargs) -> bytes:
+        if kwargs.get('separators') in ((',', ':'), [',', ':']):
+            # orjson's output already uses these
+            del kwargs['separators']
+        if kwargs:
+            raise TypeError("OrjsonProvider.dumps() got unsupported arguments: %s"
+                            % ", ".join(sorted(kwargs)))
+        option = _ORJSON_OPTIONS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default or self.default, option=option)
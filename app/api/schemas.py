@@ -0,0 +1,57 @@
+"""Typed shapes for alert API payloads."""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import orjson
+
+_SET_ALERT_FIELDS = frozenset(('coin_id', 'threshold_price'))
+
+
+@dataclass(slots=True)
+class AlertOut:
+    """Public representation of an alert.
+
+    orjson serializes slotted dataclasses natively, so no per-alert dict is built.
+    Field order matches the column order of ``get_user_alerts_rows``.
+    """
+    id: str
+    coin_id: str
+    threshold_price: float
+    is_active: bool
+    created_at: datetime
+
+
+@dataclass(slots=True)
+class SetAlertRequest:
+    """Validated body of ``POST /set-alert``."""
+    coin_id: str
+    threshold_price: float
+
+    @classmethod
+    def parse(cls, body: bytes) -> Optional['SetAlertRequest']:
+        """
+        Decode and validate a raw request body in one pass.
+        
+        Returns:
+            The parsed request, or None if the body is not a JSON object
+            containing both fields
+        
+        Raises:
+            ValueError: If threshold_price is not a number
+        """
+        try:
+            data = orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return None
+        if not isinstance(data, dict) or not data.keys() >= _SET_ALERT_FIELDS:
+            return None
+        coin_id = data['coin_id']
+        if not isinstance(coin_id, str):
+            return None
+        try:
+            threshold_price = float(data['threshold_price'])
+        except TypeError as e:
+            raise ValueError(str(e)) from e
+        return cls(coin_id.strip().lower(), threshold_price)
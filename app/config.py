@@ -12,18 +12,51 @@ class Config:
 
     SQLALCHEMY_DATABASE_URI = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Sized for request handlers plus the scheduler, task and price-fetch threads
     SQLALCHEMY_ENGINE_OPTIONS = {
-        "pool_recycle": 3600,
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 20)),
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
         "pool_timeout": 30,
         "echo": False
     }
 
+    # Create missing tables on startup; disable when a migration job owns the schema
+    RUN_CREATE_ALL = os.environ.get("RUN_CREATE_ALL", "True") == "True"
+
+    # Emit logs as JSON lines (structured ``extra=`` fields become top-level keys)
+    LOG_JSON = os.environ.get("LOG_JSON", "False") == "True"
+
+    # Run the daily alert check in this process; disable on all but one worker/replica
+    ENABLE_SCHEDULER = os.environ.get("ENABLE_SCHEDULER", "True") == "True"
+
+    # Run background tasks inline instead of on the thread pool
+    TASKS_EAGER = False
+
     MAX_CONTENT_LENGTH = 1 * 1024 * 1024
     JSON_MAX_CONTENT_LENGTH = 16 * 1024
 
     AUTH_SERVICE_URL = os.environ.get("AUTH_SERVICE_URL", "http://user-service:5000")
     PRICING_SERVICE_URL = os.environ.get("PRICING_SERVICE_URL", "http://pricing-service:5000")
+    # Multi-coin price endpoint (e.g. "/api/coins"), called as <path>?ids=a,b,c;
+    # unset to fetch each coin with its own request
+    PRICING_BATCH_PATH = os.environ.get("PRICING_BATCH_PATH", "")
+    # Keep-alive connection pools for the pricing service (each holds up to 2x this)
+    PRICING_POOL_SIZE = int(os.environ.get("PRICING_POOL_SIZE", 16))
     FRONTEND_URL = os.environ.get("FRONTEND_URL")
+    # Seconds to reuse a fetched coin price before asking the pricing service again
+    PRICE_CACHE_TTL = float(os.environ.get("PRICE_CACHE_TTL", 10))
+    # Seconds a last-known price may be served while the pricing service is down (0 disables)
+    PRICE_STALE_TTL = float(os.environ.get("PRICE_STALE_TTL", 300))
+    # Seconds to reuse a user's GET /alerts body (0 disables). Writes invalidate it
+    # in the worker that handled them; other workers may lag by up to this long.
+    USER_ALERTS_CACHE_TTL = float(os.environ.get("USER_ALERTS_CACHE_TTL", 5))
+    # Seconds to reuse a user's active push subscriptions (0 disables)
+    PUSH_SUBSCRIPTIONS_CACHE_TTL = float(os.environ.get("PUSH_SUBSCRIPTIONS_CACHE_TTL", 60))
+
+    # Serve Swagger UI / apispec.json (flasgger is only imported when enabled)
+    ENABLE_SWAGGER = os.environ.get("ENABLE_SWAGGER", "True") == "True"
 
     # Email Configuration (SMTP)
     MAIL_SERVER = os.environ.get("MAIL_SERVER")
@@ -31,16 +64,29 @@ class Config:
     MAIL_USE_TLS = os.environ.get("MAIL_USE_TLS", "True") == "True"
     MAIL_USERNAME = os.environ.get("MAIL_USERNAME")
     MAIL_PASSWORD = os.environ.get("MAIL_PASSWORD")
+    # Email is only initialised when an SMTP server is configured (or forced via ENABLE_MAIL)
+    ENABLE_MAIL = os.environ.get("ENABLE_MAIL", str(bool(MAIL_SERVER))) == "True"
+
+    # Send Web Push notifications for alerts triggered by the batch check
+    ENABLE_PUSH = os.environ.get("ENABLE_PUSH", "False") == "True"
 
 class DevelopmentConfig(Config):
     DEBUG = True
 
 class ProductionConfig(Config):
     DEBUG = False
+    ENABLE_SWAGGER = os.environ.get("ENABLE_SWAGGER", "False") == "True"
 
 class TestingConfig(Config):
     DEBUG = True
     TESTING = True
+    ENABLE_SWAGGER = False
+    TASKS_EAGER = True
+    ENABLE_SCHEDULER = False
+    PRICE_CACHE_TTL = 0
+    PRICE_STALE_TTL = 0
+    USER_ALERTS_CACHE_TTL = 0
+    PUSH_SUBSCRIPTIONS_CACHE_TTL = 0
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     SQLALCHEMY_ENGINE_OPTIONS = {
         "echo": False
@@ -1,7 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from flask_sqlalchemy import SQLAlchemy
 from flask_mail import Mail
 from apscheduler.schedulers.background import BackgroundScheduler
 
 db = SQLAlchemy()
 mail = Mail()
-scheduler = BackgroundScheduler()
\ No newline at end of file
+scheduler = BackgroundScheduler()
+executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='alert-worker')
+# Outbound push deliveries fan out here; kept separate so a batch check running
+# on ``executor`` can wait on its pushes without starving its own pool
+push_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='push-sender')
+# Concurrent per-coin pricing-service lookups for the batch check
+price_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='price-fetch')
+# SMTP sends, so a slow mail server doesn't hold the alert-check workers
+email_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='email-sender')
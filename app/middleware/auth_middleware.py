@@ -1,28 +1,22 @@
 import jwt
 import logging
-import os
-from flask import request, jsonify, g, current_app
+from flask import request, jsonify, g
 from functools import wraps
 
+from app.services.jwt_service import decode_token
 
-logger = logging.getLogger(__name__)
 
-ALGORITHM = "HS256"
+logger = logging.getLogger(__name__)
 
-def get_secret_key():
-    """Get SECRET_KEY from Flask app config."""
-    try:
-        secret = current_app.config.get('SECRET_KEY')
-        if secret:
-            logger.debug(f"Using SECRET_KEY from config: {str(secret)[:20]}...")
-            return secret
-    except RuntimeError:
-        # No app context, fallback to environment variable
-        logger.warning("current_app not available, falling back to environment variable")
-    
-    env_key = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
-    logger.debug(f"Using SECRET_KEY from environment: {str(env_key)[:20]}...")
-    return env_key
+def _bearer_token(auth_header: str):
+    """Return the token from a "Bearer <token>" header, or None if malformed."""
+    # Fast path for the canonical casing; the scheme itself is case-insensitive
+    if not (auth_header.startswith('Bearer ') or auth_header[:7].lower() == 'bearer '):
+        return None
+    token = auth_header[7:].strip()
+    if not token or ' ' in token:
+        return None
+    return token
 
 def auth_required(f):
     @wraps(f)
@@ -35,14 +29,12 @@ def auth_required(f):
         
         try:
             # Extract token from "Bearer <token>" format
-            parts = auth_header.split()
-            if len(parts) != 2 or parts[0].lower() != 'bearer':
+            token = _bearer_token(auth_header)
+            if not token:
                 logger.warning(f"Invalid Authorization header format: {auth_header[:20]}...")
                 return jsonify({'error': 'Unauthorized', 'message': 'Invalid Authorization header format'}), 401
             
-            token = parts[1]
-            secret_key = get_secret_key()
-            payload = jwt.decode(token, secret_key, algorithms=[ALGORITHM])
+            payload = decode_token(token)
             
             user_id = payload.get('user_id')
             username = payload.get('username')
@@ -58,7 +50,6 @@ def auth_required(f):
             # Also set on request for backwards compatibility
             request.user_id = user_id
             request.username = username
-            return f(*args, **kwargs)
         except jwt.ExpiredSignatureError:
             logger.error("Token has expired")
             return jsonify({'error': 'Unauthorized', 'message': 'Token expired'}), 401
@@ -68,6 +59,9 @@ def auth_required(f):
         except Exception as e:
             logger.error(f"Authorization error: {str(e)}", exc_info=True)
             return jsonify({'error': 'Unauthorized', 'message': 'Authorization failed'}), 401
+        
+        # Run the view outside the try so its errors reach the app's error handlers
+        return f(*args, **kwargs)
     return decorated
 
 def require_auth(f):
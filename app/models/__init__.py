@@ -1,3 +1,3 @@
-from .models import Alert, AlertTriggerHistory
+from .models import Alert, AlertTriggerHistory, PushSubscription
 
-__all__ = ['Alert', 'AlertTriggerHistory']
+__all__ = ['Alert', 'AlertTriggerHistory', 'PushSubscription']
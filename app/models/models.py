@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Float, Boolean
+from sqlalchemy import Column, String, DateTime, Float, Boolean, Index, Text, text
 
 import uuid
 from datetime import datetime, timezone
@@ -8,16 +8,28 @@ from app.extensions import db
 def generate_unique_id():
     return str(uuid.uuid4())
 
+def utcnow():
+    return datetime.now(timezone.utc)
+
 class Alert(db.Model):
     __tablename__ = 'alerts'
+    __table_args__ = (
+        # GET /alerts: a user's active alerts
+        Index('ix_alerts_user_active', 'user_id', 'is_active'),
+        # Batch check: partial index over active alerts only, so it stays small
+        # as alerts are deactivated
+        Index('ix_alerts_active_coin', 'coin_id',
+              postgresql_where=text('is_active'), sqlite_where=text('is_active')),
+    )
     
     id = Column(String(36), primary_key=True, default=generate_unique_id)
-    user_id = Column(String(36), nullable=False, index=True)
-    coin_id = Column(String(100), nullable=False, index=True)
+    # Lookups by user go through ix_alerts_user_active (user_id is its leading column)
+    user_id = Column(String(36), nullable=False)
+    coin_id = Column(String(100), nullable=False)
     threshold_price = Column(Float, nullable=False)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
 
 
 class AlertTriggerHistory(db.Model):
@@ -30,4 +42,21 @@ class AlertTriggerHistory(db.Model):
     current_price = Column(Float, nullable=False)
     threshold_price = Column(Float, nullable=False)
     email_sent = Column(Boolean, default=True)
-    triggered_at = Column(DateTime, default=datetime.now(timezone.utc))
+    triggered_at = Column(DateTime, default=utcnow)
+
+
+class PushSubscription(db.Model):
+    __tablename__ = 'push_subscriptions'
+    __table_args__ = (
+        # Delivery lookups: a user's active subscriptions. Partial so it only holds
+        # deliverable rows; subscription_data stays out of the index because it is
+        # unbounded Text and could exceed the btree tuple size limit
+        Index('ix_push_subscriptions_user_active', 'user_id',
+              postgresql_where=text('is_active'), sqlite_where=text('is_active')),
+    )
+    
+    id = Column(String(36), primary_key=True, default=generate_unique_id)
+    user_id = Column(String(36), nullable=False)
+    subscription_data = Column(Text, nullable=False)  # JSON-encoded Web Push subscription
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=utcnow)
@@ -1,19 +1,42 @@
 from app.models import Alert, AlertTriggerHistory
-from app.extensions import db
-from app.services.coin_service import get_coin_price
+from app.models.models import utcnow
+from app.extensions import db, email_executor
+from app.services.coin_service import get_coin_price, get_coin_prices
 from app.services.email_service import send_alert_email
-from sqlalchemy import and_
+from app.services.push_service import trigger_alert_push_notifications
+from sqlalchemy import case, select, update
+from flask import current_app
+from app.utils.background import submit_task_to
+from app.utils.cache import TTLCache
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Held while a batch check runs so overlapping triggers don't stampede
+_check_all_lock = threading.Lock()
+
+# Triggered alerts fetched per round-trip during a batch check
+BATCH_CHUNK_SIZE = 500
+# A user's alerts fetched per round-trip when listing them
+USER_ALERTS_CHUNK_SIZE = 200
+
+# Serialized GET /alerts bodies keyed by user_id. Writes in this process
+# invalidate the user's entry; other workers see changes after the TTL.
+_user_alerts_cache = TTLCache(maxsize=10_000)
+# Bumped on every invalidation so a listing read before a write can't be cached after it
+_user_alerts_generation = 0
+# Makes the generation bump + pop and the generation check + set atomic with each other
+_user_alerts_lock = threading.Lock()
+
 def create_alert(user_id: str, user_email: str, coin_id: str, threshold_price: float) -> tuple:
     """Create a new price alert.
     
     Returns:
         tuple: (alert object, user_email) for subsequent operations
     """
-    logger.debug(f"[ALERT] Creating new alert - User: {user_id}, Email: {user_email}, Coin: {coin_id}, Threshold: ${threshold_price}")
+    logger.debug("[ALERT] Creating new alert - User: %s, Email: %s, Coin: %s, Threshold: $%s",
+                 user_id, user_email, coin_id, threshold_price)
     
     alert = Alert(
         user_id=user_id,
@@ -23,8 +46,9 @@ def create_alert(user_id: str, user_email: str, coin_id: str, threshold_price: f
     )
     db.session.add(alert)
     db.session.commit()
+    invalidate_user_alerts(user_id)
     
-    logger.info(f"[ALERT] Alert created successfully - Alert ID: {alert.id}, User: {user_id}, Email: {user_email}")
+    logger.info("[ALERT] Alert created successfully - Alert ID: %s, User: %s, Email: %s", alert.id, user_id, user_email)
     return alert, user_email 
 
 def check_alert_and_notify(alert: Alert, user_email: str = None) -> bool:
@@ -36,23 +60,27 @@ def check_alert_and_notify(alert: Alert, user_email: str = None) -> bool:
         user_email: User email address (required for notifications)
         
     Returns:
-        bool: True if notification was triggered, False otherwise
+        bool: True if a notification was queued, False otherwise
     """
     if not user_email:
-        logger.warning(f"[ALERT] No user email provided for alert {alert.id}")
+        logger.warning("[ALERT] No user email provided for alert %s", alert.id)
         return False
     
     try:
         current_price = get_coin_price(alert.coin_id)
-        logger.debug(f"[ALERT] Got price for {alert.coin_id}: ${current_price}")
+        logger.debug("[ALERT] Got price for %s: $%s", alert.coin_id, current_price)
         
         if current_price is None:
-            logger.warning(f"[ALERT] Could not fetch price for {alert.coin_id}")
+            logger.warning("[ALERT] Could not fetch price for %s", alert.coin_id)
             return False
         
         if current_price >= alert.threshold_price:
-            logger.info(f"[ALERT TRIGGERED] Alert ID: {alert.id} | User Email: {user_email} | Coin: {alert.coin_id} | Current Price: ${current_price} >= Threshold: ${alert.threshold_price}")
-            return trigger_alert_email(
+            logger.info("[ALERT TRIGGERED] Alert ID: %s | User Email: %s | Coin: %s | Current Price: $%s >= Threshold: $%s",
+                        alert.id, user_email, alert.coin_id, current_price, alert.threshold_price)
+            # Send (and record) on the email executor so SMTP latency doesn't
+            # hold this worker; the history row still reflects the real outcome
+            submit_task_to(
+                email_executor, current_app._get_current_object(), trigger_alert_email,
                 user_id=alert.user_id,
                 user_email=user_email,
                 coin_id=alert.coin_id,
@@ -60,13 +88,32 @@ def check_alert_and_notify(alert: Alert, user_email: str = None) -> bool:
                 threshold_price=alert.threshold_price,
                 alert_id=alert.id
             )
+            return True
         else:
-            logger.debug(f"[ALERT] Threshold not met for alert {alert.id}. {current_price} < {alert.threshold_price}")
+            logger.debug("[ALERT] Threshold not met for alert %s. %s < %s", alert.id, current_price, alert.threshold_price)
         return False
     except Exception as e:
-        logger.error(f"[ALERT] Error checking alert {alert.id}: {e}", exc_info=True)
+        logger.error("[ALERT] Error checking alert %s: %s", alert.id, e, exc_info=True)
         return False
 
+def check_alert_by_id(alert_id: str, user_email: str) -> bool:
+    """
+    Load an alert by ID and run check_alert_and_notify on it.
+    
+    Used by background workers, which must not share ORM instances with the
+    request thread that created the alert.
+    
+    Returns:
+        bool: True if a notification was queued, False otherwise
+    """
+    alert = db.session.get(Alert, alert_id)
+    if alert is None:
+        logger.warning("[ALERT] Alert %s no longer exists - skipping check", alert_id)
+        return False
+    notification_queued = check_alert_and_notify(alert, user_email)
+    logger.info("[ALERT] Immediate alert check for alert %s: notification_queued=%s", alert_id, notification_queued)
+    return notification_queued
+
 def trigger_alert_email(user_id: str, user_email: str, coin_id: str, 
                         current_price: float, threshold_price: float, 
                         alert_id: str, app=None) -> bool:
@@ -85,7 +132,7 @@ def trigger_alert_email(user_id: str, user_email: str, coin_id: str,
     Returns:
         bool: True if email was sent successfully
     """
-    logger.info(f"[EMAIL] Sending alert email - To: {user_email} | Alert ID: {alert_id} | Coin: {coin_id}")
+    logger.info("[EMAIL] Sending alert email - To: %s | Alert ID: %s | Coin: %s", user_email, alert_id, coin_id)
     
     email_sent = send_alert_email(
         recipient_email=user_email,
@@ -96,9 +143,9 @@ def trigger_alert_email(user_id: str, user_email: str, coin_id: str,
     )
     
     if email_sent:
-        logger.info(f"[EMAIL SENT] Successfully sent to {user_email} - Alert ID: {alert_id}")
+        logger.info("[EMAIL SENT] Successfully sent to %s - Alert ID: %s", user_email, alert_id)
     else:
-        logger.error(f"[EMAIL FAILED] Failed to send email to {user_email} - Alert ID: {alert_id}")
+        logger.error("[EMAIL FAILED] Failed to send email to %s - Alert ID: %s", user_email, alert_id)
     
     # Record this trigger in history
     history = AlertTriggerHistory(
@@ -112,48 +159,175 @@ def trigger_alert_email(user_id: str, user_email: str, coin_id: str,
     db.session.add(history)
     db.session.commit()
     
-    logger.debug(f"[ALERT] Trigger history recorded - Alert ID: {alert_id}, Email Sent: {email_sent}")
+    logger.debug("[ALERT] Trigger history recorded - Alert ID: %s, Email Sent: %s", alert_id, email_sent)
     return email_sent
 
 def get_user_alerts(user_id: str):
     """Get all active alerts for a user."""
-    return Alert.query.filter(
-        and_(Alert.user_id == user_id, Alert.is_active == True)
-    ).all()
+    stmt = select(Alert).where(Alert.user_id == user_id, Alert.is_active == True)
+    return db.session.execute(stmt).scalars().all()
+
+def get_user_alerts_rows(user_id: str):
+    """Get the public columns of a user's active alerts as lightweight rows.
+
+    Rows are ordered as (id, coin_id, threshold_price, is_active, created_at)
+    and skip ORM entity construction entirely.
+    
+    Returns:
+        Result: Rows fetched USER_ALERTS_CHUNK_SIZE at a time; iterate it or
+        use ``.partitions()`` for chunked processing
+    """
+    stmt = select(
+        Alert.id, Alert.coin_id, Alert.threshold_price, Alert.is_active, Alert.created_at
+    ).where(Alert.user_id == user_id, Alert.is_active == True)
+    return db.session.execute(stmt.execution_options(yield_per=USER_ALERTS_CHUNK_SIZE))
+
+def user_alerts_cache_generation() -> int:
+    """Snapshot to pass to cache_user_alerts_body before reading a user's alerts."""
+    with _user_alerts_lock:
+        return _user_alerts_generation
+
+def get_cached_user_alerts_body(user_id: str):
+    """Return the cached GET /alerts body for a user, or None."""
+    return _user_alerts_cache.get(user_id)
+
+def cache_user_alerts_body(user_id: str, body: bytes, generation: int) -> None:
+    """
+    Cache a user's serialized alert listing for USER_ALERTS_CACHE_TTL seconds.
+    
+    Args:
+        user_id: The user the listing belongs to
+        body: The serialized response body
+        generation: user_alerts_cache_generation() taken before the listing was read;
+            the body is dropped if any invalidation happened since
+    """
+    ttl = current_app.config.get('USER_ALERTS_CACHE_TTL', 0)
+    if ttl <= 0:
+        return
+    with _user_alerts_lock:
+        if generation == _user_alerts_generation:
+            _user_alerts_cache.set(user_id, body, ttl=ttl)
+
+def invalidate_user_alerts(user_id: str) -> None:
+    """Drop a user's cached alert listing after their alerts change."""
+    global _user_alerts_generation
+    with _user_alerts_lock:
+        _user_alerts_generation += 1
+        _user_alerts_cache.pop(user_id)
 
 def deactivate_alert(alert_id: str) -> bool:
-    """Deactivate an alert."""
-    alert = Alert.query.get(alert_id)
-    if alert:
-        alert.is_active = False
-        db.session.commit()
-        return True
-    return False
+    """Deactivate an alert.
+    
+    Issues a single UPDATE rather than loading the alert first. The batch check
+    deactivates its triggered alerts in bulk instead (see _deactivate_alerts).
+    
+    Returns:
+        bool: True if the alert exists, False otherwise
+    """
+    user_id = db.session.execute(
+        update(Alert).where(Alert.id == alert_id)
+        .values(is_active=False, updated_at=utcnow())
+        .returning(Alert.user_id)
+    ).scalar()
+    db.session.commit()
+    if user_id is None:
+        return False
+    invalidate_user_alerts(user_id)
+    return True
 
 def check_all_alerts(app):
     """
     Check all active alerts and trigger email notifications if thresholds are met.
-    This function is called by the scheduler.
+    This function is called by the scheduler and the /check-alerts endpoint.
+    
+    If a batch check is already running, this call is skipped.
     
     Args:
         app: Flask application instance
+    
+    Returns:
+        list: IDs of the alerts whose threshold was met, or None if skipped
     """
+    if not _check_all_lock.acquire(blocking=False):
+        logger.info("[ALERT] Batch check already in progress - skipping")
+        return None
+    try:
+        return _check_all_alerts(app)
+    finally:
+        _check_all_lock.release()
+
+def _check_all_alerts(app):
+    """Run one batch check. Callers must hold ``_check_all_lock``."""
     logger.info("[ALERT] Starting batch check of all active alerts")
     
     with app.app_context():
-        active_alerts = Alert.query.filter(Alert.is_active == True).all()
-        logger.debug(f"[ALERT] Found {len(active_alerts)} active alerts to check")
+        # One price lookup per distinct coin that has an active alert
+        coin_ids = db.session.execute(
+            select(Alert.coin_id).where(Alert.is_active == True).distinct()
+        ).scalars().all()
+        prices = {coin_id: price for coin_id, price in get_coin_prices(coin_ids).items()
+                  if price is not None}
+        logger.debug("[ALERT] Got prices for %s of %s coins with active alerts", len(prices), len(coin_ids))
+        if not prices:
+            return []
+        
+        # Compare thresholds in SQL so only triggered alerts come back
+        current_price = case(prices, value=Alert.coin_id)
+        stmt = select(
+            Alert.id, Alert.user_id, Alert.coin_id, Alert.threshold_price, current_price
+        ).where(
+            Alert.is_active == True,
+            Alert.coin_id.in_(prices.keys()),
+            Alert.threshold_price <= current_price,
+        ).execution_options(yield_per=BATCH_CHUNK_SIZE)
+        
+        push_enabled = app.config.get('ENABLE_PUSH', False)
+        triggered = []
         
-        for alert in active_alerts:
-            # Note: For batch checks, user_email is not available.
-            # Email notifications should be triggered when alerts are created.
-            # To support batch notifications, user_email would need to be
-            # fetched from a user service or stored separately.
-            current_price = get_coin_price(alert.coin_id)
+        # Stream triggered alerts in chunks so memory stays flat and early
+        # chunks are notified before the rest have been read
+        for chunk in db.session.execute(stmt).partitions():
+            to_push = []
+            for alert_id, user_id, coin_id, threshold_price, price in chunk:
+                # Note: For batch checks, user_email is not available.
+                # Email notifications should be triggered when alerts are created.
+                # To support batch notifications, user_email would need to be
+                # fetched from a user service or stored separately.
+                logger.warning("[ALERT BATCH] Alert triggered for user %s, coin %s at price $%s (threshold: $%s) - Alert ID: %s",
+                               user_id, coin_id, price, threshold_price, alert_id)
+                triggered.append(alert_id)
+                to_push.append((user_id, coin_id, price, threshold_price))
             
-            if current_price is not None and current_price >= alert.threshold_price:
-                logger.warning(f"[ALERT BATCH] Alert triggered for user {alert.user_id}, coin {alert.coin_id} at price ${current_price} (threshold: ${alert.threshold_price}) - Alert ID: {alert.id}")
-                # Placeholder: In production, retrieve user_email from user service
-            else:
-                logger.debug(f"[ALERT BATCH] Alert {alert.id} - no trigger. Current: ${current_price}, Threshold: ${alert.threshold_price}")
+            # Push the chunk's triggers in parallel before reading the next chunk
+            if to_push and push_enabled:
+                # Deactivations are committed once the stream is exhausted
+                delivered = trigger_alert_push_notifications(to_push, commit=False)
+                logger.info("[ALERT BATCH] Delivered %s push notifications for %s triggered alerts", delivered, len(to_push))
+        
+        if push_enabled:
+            # Pushed alerts are done: deactivate them in the same transaction as the
+            # subscription cleanup so the next check doesn't push them again
+            user_ids = _deactivate_alerts(triggered)
+            db.session.commit()
+            # Only after the commit, so a concurrent listing can't re-cache the old rows
+            for user_id in user_ids:
+                invalidate_user_alerts(user_id)
+        logger.debug("[ALERT] Batch check triggered %s alerts", len(triggered))
+        return triggered
 
+def _deactivate_alerts(alert_ids: list) -> set:
+    """Deactivate alerts in bulk without committing.
+    
+    Issues one UPDATE per BATCH_CHUNK_SIZE IDs to stay under bind parameter limits.
+    
+    Returns:
+        set: IDs of the users whose alerts were deactivated
+    """
+    user_ids = set()
+    for start in range(0, len(alert_ids), BATCH_CHUNK_SIZE):
+        user_ids.update(db.session.execute(
+            update(Alert).where(Alert.id.in_(alert_ids[start:start + BATCH_CHUNK_SIZE]))
+            .values(is_active=False, updated_at=utcnow())
+            .returning(Alert.user_id)
+        ).scalars())
+    return user_ids
@@ -1,46 +1,174 @@
+import re
 import requests
-from typing import Optional
+import threading
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import quote
 import logging
+import orjson
 from flask import current_app
-from app.utils.resilience import retry, circuit_breaker
+from app.extensions import price_executor
+from app.utils.cache import TTLCache
+from app.utils.resilience import CircuitOpenError, retry, circuit_breaker
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
-# Create a session with no built-in retries to avoid confusion with @retry decorator
-session = requests.Session()
-adapter = HTTPAdapter(max_retries=Retry(total=0))  # Disable urllib3 retries
-session.mount('http://', adapter)
-session.mount('https://', adapter)
+DEFAULT_PRICING_POOL_SIZE = 16
+
+def _build_session(pool_size: int) -> requests.Session:
+    """
+    Create a keep-alive session for the pricing service.
+    
+    urllib3 retries are disabled so they don't stack with the @retry decorator.
+    
+    Args:
+        pool_size: Number of host pools; each keeps up to twice as many connections
+    """
+    http = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size * 2,
+        max_retries=Retry(total=0)  # Disable urllib3 retries
+    )
+    http.mount('http://', adapter)
+    http.mount('https://', adapter)
+    return http
+
+# Used outside an app context; apps get their own from get_pricing_session()
+session = _build_session(DEFAULT_PRICING_POOL_SIZE)
+
+# (connect, read) seconds: an unreachable host fails fast instead of using the full read budget
+REQUEST_TIMEOUT = (2, 5)
+
+# Recently fetched prices, shared by every caller in this process
+DEFAULT_PRICE_CACHE_TTL = 10
+_price_cache = TTLCache(maxsize=1024, ttl=DEFAULT_PRICE_CACHE_TTL)
+
+# Shape of a pricing-service coin ID (e.g. "bitcoin", "usd-coin")
+_COIN_ID_PATTERN = re.compile(r"[a-z0-9][a-z0-9._-]*\Z")
+
+# Last-known prices, served when the pricing service is unavailable
+DEFAULT_PRICE_STALE_TTL = 300
+_stale_prices = TTLCache(maxsize=1024, ttl=DEFAULT_PRICE_STALE_TTL)
+
+# url -> (ETag, parsed body) of the last response, for conditional requests
+_etag_cache = TTLCache(maxsize=1024, ttl=300)
+
+# coin_id -> Future for lookups currently in progress
+_inflight = {}
+_inflight_lock = threading.Lock()
 
 def get_pricing_service_url():
-    """Get pricing service URL from config or use default."""
+    """Get pricing service URL from config (resolved once per app) or use default."""
     try:
-        url = current_app.config.get("PRICING_SERVICE_URL", "http://pricing-service:12000")
-        logger.info(f"[COIN] App context available. Using PRICING_SERVICE_URL from config: {url}")
-        return url
+        app = current_app._get_current_object()
     except RuntimeError as e:
         url = "http://pricing-service:12000"
-        logger.warning(f"[COIN] No app context (RuntimeError: {str(e)}). Using fallback PRICING_SERVICE_URL: {url}")
+        logger.warning("[COIN] No app context (RuntimeError: %s). Using fallback PRICING_SERVICE_URL: %s", e, url)
         return url
+    url = app.extensions.get("pricing_service_url")
+    if url is None:
+        url = app.extensions["pricing_service_url"] = app.config["PRICING_SERVICE_URL"]
+        logger.debug("[COIN] Using PRICING_SERVICE_URL from config: %s", url)
+    return url
+
+def get_coin_url_prefix() -> str:
+    """Get "<PRICING_SERVICE_URL>/api/coin/", built once per app."""
+    try:
+        app = current_app._get_current_object()
+    except RuntimeError:
+        return get_pricing_service_url().rstrip("/") + "/api/coin/"
+    prefix = app.extensions.get("pricing_coin_url_prefix")
+    if prefix is None:
+        prefix = app.extensions["pricing_coin_url_prefix"] = get_pricing_service_url().rstrip("/") + "/api/coin/"
+    return prefix
 
-@circuit_breaker(failure_threshold=5, recovery_timeout=15, name="pricing_service")
-@retry(max_attempts=3, delay=1)
+def get_pricing_session() -> requests.Session:
+    """Get the app's pooled pricing-service session (``app.extensions['pricing_http']``)."""
+    try:
+        app = current_app._get_current_object()
+    except RuntimeError:
+        return session
+    http = app.extensions.get("pricing_http")
+    if http is None:
+        http = app.extensions.setdefault("pricing_http", _build_session(app.config["PRICING_POOL_SIZE"]))
+    return http
+
+def get_price_cache_ttl() -> float:
+    """Get the price cache TTL in seconds from config (0 disables caching)."""
+    try:
+        return current_app.config.get("PRICE_CACHE_TTL", DEFAULT_PRICE_CACHE_TTL)
+    except RuntimeError:
+        return DEFAULT_PRICE_CACHE_TTL
+
+def get_price_stale_ttl() -> float:
+    """Get how long a last-known price may stand in for an unavailable pricing service (0 disables)."""
+    try:
+        return current_app.config.get("PRICE_STALE_TTL", DEFAULT_PRICE_STALE_TTL)
+    except RuntimeError:
+        return DEFAULT_PRICE_STALE_TTL
+
+def get_pricing_batch_path() -> str:
+    """Get the batch price endpoint path from config ("" when not configured)."""
+    try:
+        return current_app.config.get("PRICING_BATCH_PATH", "")
+    except RuntimeError:
+        return ""
+
+def peek_coin_price(coin_id: str) -> Optional[float]:
+    """Return the cached price for a coin without contacting the pricing service.
+    
+    Returns:
+        The cached price in USD, or None on a cache miss or when caching is disabled
+    """
+    if get_price_cache_ttl() <= 0:
+        return None
+    return _price_cache.get(coin_id)
+
+def _is_client_error(error: Exception) -> bool:
+    """True for a 4xx reply (e.g. an unknown coin), which retrying won't fix."""
+    response = getattr(error, "response", None)
+    return response is not None and 400 <= response.status_code < 500
+
+@circuit_breaker(failure_threshold=5, recovery_timeout=15, name="pricing_service",
+                 ignore=_is_client_error)
+@retry(max_attempts=3, delay=0.2, max_delay=2,
+       retry_on=(requests.ConnectionError, requests.Timeout, requests.HTTPError),
+       giveup=_is_client_error)
 def _fetch_coin_price(url: str) -> dict:
     """
     Fetch coin price from pricing service with resilience patterns.
     
     Decorator order (outermost to innermost):
     1. @circuit_breaker: Fails fast when service is down (prevents cascading failures)
-    2. @retry: Retries transient failures up to 3 times with exponential backoff
+    2. @retry: Retries connection errors, timeouts and 5xx replies up to 3 times with
+       jittered exponential backoff (~0.2s, ~0.4s); 4xx replies are not retried
+    
+    A 4xx reply (e.g. an unknown coin ID from a user) is raised but doesn't count
+    towards opening the circuit, so bad IDs can't cut off lookups for valid ones.
     
     This order ensures: circuit breaker can reject requests immediately without retry interference.
     """
-    # Use session without built-in retries (we have @retry decorator for that)
-    response = session.get(url, timeout=5)
-    response.raise_for_status()
-    return response.json()
+    # Revalidate with the last ETag so an unchanged price costs a bodiless 304
+    previous = _etag_cache.get(url)
+    headers = {"If-None-Match": previous[0]} if previous else None
+    
+    # Pooled session without built-in retries (we have @retry decorator for that)
+    response = get_pricing_session().get(url, timeout=REQUEST_TIMEOUT, headers=headers)
+    if response.status_code == 304 and previous:
+        return previous[1]
+    status = response.status_code
+    if not 200 <= status < 300:
+        # Cheaper than raise_for_status(), which decodes the reason and URL for its message
+        raise requests.HTTPError("pricing service returned HTTP %d" % status, response=response)
+    # Parse the raw bytes directly; skips requests' charset detection and str decode
+    data = orjson.loads(response.content)
+    etag = response.headers.get("ETag")
+    if etag:
+        _etag_cache.set(url, (etag, data))
+    return data
 
 def get_coin_price(coin_id: str) -> Optional[float]:
     """
@@ -50,42 +178,187 @@ def get_coin_price(coin_id: str) -> Optional[float]:
     - If pricing service is down, _fetch_coin_price() will retry 3 times
     - After 5 consecutive failures, circuit breaker opens and raises immediately
     
+    Successful lookups are cached for PRICE_CACHE_TTL seconds; failures are not.
+    If the pricing service is unavailable, a price seen within PRICE_STALE_TTL
+    seconds is returned instead of None.
+    
     Args:
         coin_id: The coin ID (e.g., 'bitcoin', 'ethereum')
     
     Returns:
         The current price in USD, or None if unavailable
     """
-    pricing_service_url = get_pricing_service_url()
-    url = f"{pricing_service_url}/api/coin/{coin_id}"
-    logger.info(f"[COIN] Fetching price from {url} (timeout: 5s)")
+    cache_ttl = get_price_cache_ttl()
+    if cache_ttl > 0:
+        cached = _price_cache.get(coin_id)
+        if cached is not None:
+            logger.debug("[COIN] Cache hit for %s: $%s", coin_id, cached)
+            return cached
+    
+    # Coalesce concurrent misses for the same coin into one upstream request
+    with _inflight_lock:
+        pending = _inflight.get(coin_id)
+        if pending is None:
+            pending = _inflight[coin_id] = Future()
+            leader = True
+        else:
+            leader = False
+    if not leader:
+        logger.debug("[COIN] Waiting on in-flight lookup for %s", coin_id)
+        return pending.result()
+    
+    try:
+        price = _lookup_coin_price(coin_id, cache_ttl)
+    except BaseException as e:
+        pending.set_exception(e)
+        raise
+    else:
+        pending.set_result(price)
+    finally:
+        with _inflight_lock:
+            del _inflight[coin_id]
+    return price
+
+def _lookup_coin_price(coin_id: str, cache_ttl: float) -> Optional[float]:
+    """Request one coin's price from the pricing service and cache it on success."""
+    url = get_coin_url_prefix() + coin_id
+    logger.debug("[COIN] Fetching price from %s (timeout: %s)", url, REQUEST_TIMEOUT)
     
     try:
         # _fetch_coin_price() handles retries and circuit breaker
         data = _fetch_coin_price(url)
         
         # Check if response has the expected structure
-        if data.get("status") != "success" or "data" not in data:
-            logger.warning(f"[COIN] Invalid response structure for {coin_id}: {data}")
+        try:
+            valid = data["status"] == "success"
+            price = data["data"]["current_price"]
+        except (KeyError, TypeError):
+            valid = False
+        if not valid:
+            logger.warning("[COIN] Invalid response structure for %s: %.500r", coin_id, data)
             return None
         
-        coin_data = data.get("data", {})
-        price = coin_data.get("current_price")
-        
-        if price is not None:
-            logger.info(f"[COIN] Successfully fetched price for {coin_id}: ${price}")
+        # Anything but a number (e.g. "n/a") counts as no price, and is never cached
+        if _is_price(price):
+            logger.debug("[COIN] Successfully fetched price for %s: $%s", coin_id, price)
+            _remember_price(coin_id, price, cache_ttl)
             return price
         else:
-            logger.warning(f"[COIN] No price data in response for {coin_id}: {coin_data}")
+            logger.warning("[COIN] No price data in response for %s: %.500r", coin_id, data["data"])
             return None
             
     except Exception as e:
+        if _is_client_error(e):
+            # The service answered: the coin is unknown or delisted, so a stale price would be wrong
+            logger.warning("[COIN] Pricing service rejected %s: %s", coin_id, e)
+            return None
+        
         error_msg = str(e)
-        # Check if it's a circuit breaker error
-        if "is OPEN" in error_msg:
-            logger.error(f"[COIN] Circuit breaker is OPEN - pricing service unavailable")
+        if isinstance(e, CircuitOpenError):
+            logger.error("[COIN] Circuit breaker is OPEN - pricing service unavailable")
         elif "Max retries exceeded" in error_msg or "Connection refused" in error_msg:
-            logger.error(f"[COIN] Pricing service unavailable - retry mechanism exhausted")
+            logger.error("[COIN] Pricing service unavailable - retry mechanism exhausted")
+        else:
+            logger.error("[COIN] Error fetching price: %s", error_msg)
+        
+        # Upstream is unavailable (transport error or 5xx): a recent last-known price beats no price
+        stale = _stale_prices.get(coin_id)
+        if stale is not None:
+            logger.warning("[COIN] Serving stale price for %s: $%s (stale=True)", coin_id, stale)
+        return stale
+
+def _remember_price(coin_id: str, price: float, cache_ttl: float) -> None:
+    """Store a fresh price in the price cache and as the last-known fallback."""
+    if cache_ttl > 0:
+        _price_cache.set(coin_id, price, ttl=cache_ttl)
+    stale_ttl = get_price_stale_ttl()
+    if stale_ttl > 0:
+        _stale_prices.set(coin_id, price, ttl=stale_ttl)
+
+def _fetch_coin_prices_batch(coin_ids: List[str]) -> Optional[Dict[str, Optional[float]]]:
+    """
+    Fetch several prices with one request to PRICING_BATCH_PATH.
+    
+    Accepts ``data`` as either a list of coin objects with ``id`` and
+    ``current_price`` or a mapping of coin ID to coin object.
+    
+    Returns:
+        Mapping of the requested coin IDs to prices (None where absent), or
+        None if the batch request failed and callers should fall back
+    """
+    url = get_pricing_service_url().rstrip("/") + get_pricing_batch_path()
+    ids = quote(",".join(sorted(coin_ids)), safe=",")
+    logger.info("[COIN] Fetching %d prices from %s", len(coin_ids), url)
+    try:
+        data = _fetch_coin_price(f"{url}?ids={ids}")
+    except Exception as e:
+        logger.error("[COIN] Batch price request failed, falling back to per-coin requests: %s", e)
+        return None
+    
+    try:
+        if data.get("status") != "success":
+            raise ValueError("status is not success")
+        coins = data["data"]
+        if isinstance(coins, list):
+            coins = {coin.get("id"): coin for coin in coins if isinstance(coin, dict)}
+        prices = {}
+        for coin_id in coin_ids:
+            price = (coins.get(coin_id) or {}).get("current_price")
+            # Anything but a number (e.g. a string or a nested object) counts as no price
+            prices[coin_id] = price if _is_price(price) else None
+    except (AttributeError, KeyError, TypeError, ValueError):
+        logger.warning("[COIN] Invalid batch response structure, falling back to per-coin requests: %.500r", data)
+        return None
+    return prices
+
+def _is_price(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def get_coin_prices(coin_ids: Iterable[str]) -> Dict[str, Optional[float]]:
+    """
+    Fetch current prices for several coins, querying each distinct coin once.
+    
+    Cached prices are used first. When PRICING_BATCH_PATH is configured the
+    rest are fetched in a single request; IDs that are not valid slugs, or all
+    of them if that request fails, are fetched individually, concurrently on
+    the price executor.
+    
+    Args:
+        coin_ids: Coin IDs to look up (duplicates are collapsed)
+    
+    Returns:
+        Mapping of coin ID to its price in USD, or None where unavailable
+    """
+    prices = {}
+    missing = []
+    for coin_id in set(coin_ids):
+        cached = peek_coin_price(coin_id)
+        if cached is not None:
+            prices[coin_id] = cached
         else:
-            logger.error(f"[COIN] Error fetching price: {error_msg}")
-        return None
\ No newline at end of file
+            missing.append(coin_id)
+    
+    if len(missing) > 1 and get_pricing_batch_path():
+        # IDs that can't be valid slugs would make the pricing service reject the
+        # whole batch; they go through the per-coin path instead
+        batchable = [coin_id for coin_id in missing if _COIN_ID_PATTERN.match(coin_id)]
+        fetched = _fetch_coin_prices_batch(batchable) if len(batchable) > 1 else None
+        if fetched is not None:
+            cache_ttl = get_price_cache_ttl()
+            for coin_id, price in fetched.items():
+                if price is not None:
+                    _remember_price(coin_id, price, cache_ttl)
+            prices.update(fetched)
+            missing = [coin_id for coin_id in missing if coin_id not in fetched]
+    
+    if len(missing) > 1:
+        # Independent lookups; run them concurrently rather than one RTT after another
+        app = current_app._get_current_object()
+        prices.update(zip(missing, price_executor.map(_get_coin_price_in_context, [app] * len(missing), missing)))
+    else:
+        prices.update((coin_id, get_coin_price(coin_id)) for coin_id in missing)
+    return prices
+
+def _get_coin_price_in_context(app, coin_id: str) -> Optional[float]:
+    with app.app_context():
+        return get_coin_price(coin_id)
@@ -1,14 +1,12 @@
 from flask_mail import Message
 from app.extensions import mail
-from flask import render_template_string
+from jinja2 import Environment
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
-def get_alert_email_template(alert_data: dict) -> str:
-    """Get the HTML template for the alert email."""
-    html_template = """
+_ALERT_HTML_TEMPLATE = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -129,16 +127,16 @@ def get_alert_email_template(alert_data: dict) -> str:
                 <div class="alert-details">
                     <div class="detail-item">
                         <div class="detail-label">Current Price</div>
-                        <div class="detail-value price-highlight">€{{ current_price | round(2) }}</div>
+                        <div class="detail-value price-highlight">€{{ current_price }}</div>
                     </div>
                     <div class="detail-item">
                         <div class="detail-label">Alert Threshold</div>
-                        <div class="detail-value">€{{ threshold_price | round(2) }}</div>
+                        <div class="detail-value">€{{ threshold_price }}</div>
                     </div>
                 </div>
                 
                 <p style="background-color: #fef3c7; border-left: 4px solid #f59e0b; padding: 15px; border-radius: 4px; margin: 20px 0; font-size: 14px;">
-                    <strong>📌 Note:</strong> Your alert triggered when the price reached <strong>€{{ current_price | round(2) }}</strong>, which is at or above your threshold of <strong>€{{ threshold_price | round(2) }}</strong>.
+                    <strong>📌 Note:</strong> Your alert triggered when the price reached <strong>€{{ current_price }}</strong>, which is at or above your threshold of <strong>€{{ threshold_price }}</strong>.
                 </p>
                 
                 <p style="text-align: center; margin-top: 30px;">
@@ -160,7 +158,14 @@ def get_alert_email_template(alert_data: dict) -> str:
     </body>
     </html>
     """
-    return html_template
+
+# Compiled once; autoescape matches render_template_string's behaviour for string templates
+_ALERT_TEMPLATE = Environment(autoescape=True).from_string(_ALERT_HTML_TEMPLATE)
+_ALERT_SUBJECT = "🚨 {} Price Alert: €{:.2f}".format
+
+def get_alert_email_template(alert_data: dict) -> str:
+    """Get the HTML template for the alert email."""
+    return _ALERT_HTML_TEMPLATE
 
 
 def send_alert_email(recipient_email: str, coin_id: str, current_price: float, 
@@ -182,7 +187,7 @@ def send_alert_email(recipient_email: str, coin_id: str, current_price: float,
         bool: True if email was sent successfully, False otherwise
     """
     try:
-        from flask import current_app
+        from flask import current_app, has_app_context
         
         # Get the app instance for context
         app_instance = app or current_app
@@ -196,45 +201,45 @@ def send_alert_email(recipient_email: str, coin_id: str, current_price: float,
         if not app_instance.config.get('MAIL_SERVER'):
             logger.warning("[EMAIL] MAIL_SERVER not configured - email sending is disabled")
             return False
+        if 'mail' not in app_instance.extensions:
+            logger.warning("[EMAIL] Mail extension not initialized (ENABLE_MAIL is off) - email sending is disabled")
+            return False
         
-        logger.debug(f"[EMAIL] Preparing alert email - To: {recipient_email}, Coin: {coin_id}, Price: €{current_price}, Threshold: €{threshold_price}")
-        
-        # Get the template
-        template = get_alert_email_template({
-            'coin_id': coin_id,
-            'current_price': current_price,
-            'threshold_price': threshold_price
-        })
+        logger.debug("[EMAIL] Preparing alert email - To: %s, Coin: %s, Price: €%s, Threshold: €%s",
+                     recipient_email, coin_id, current_price, threshold_price)
         
-        # Render the template with context
-        html_content = render_template_string(
-            template,
+        # Render the precompiled template; prices are formatted here rather than
+        # through a Jinja filter at every place they appear
+        html_content = _ALERT_TEMPLATE.render(
             coin_name=coin_id,
-            current_price=current_price,
-            threshold_price=threshold_price,
+            current_price=f"{current_price:.2f}",
+            threshold_price=f"{threshold_price:.2f}",
             portfolio_url=portfolio_url or "http://20.251.246.218/portfolio",
             unsubscribe_url=unsubscribe_url or "#",
             timestamp=datetime.utcnow().strftime("%B %d, %Y at %H:%M UTC")
         )
         
-        # Create the email message with sender
-        mail_username = app_instance.config.get('MAIL_USERNAME', 'noreply@cryptotracker.com')
+        # Create the email message with the sender resolved at startup
         msg = Message(
-            subject=f"🚨 {coin_id.upper()} Price Alert: €{current_price:.2f}",
+            subject=_ALERT_SUBJECT(coin_id.upper(), current_price),
             recipients=[recipient_email],
             html=html_content,
-            sender=mail_username
+            sender=app_instance.extensions['alert_mail_sender']
         )
         
-        logger.debug(f"[EMAIL] Sending message to {recipient_email}")
+        logger.debug("[EMAIL] Sending message to %s", recipient_email)
         
-        # Send the email within app context
-        with app_instance.app_context():
+        # Background tasks already run inside this app's context; only push one
+        # when called from elsewhere
+        if app is None or (has_app_context() and current_app._get_current_object() is app):
             mail.send(msg)
+        else:
+            with app_instance.app_context():
+                mail.send(msg)
         
-        logger.info(f"[EMAIL] Successfully sent alert email to {recipient_email} for {coin_id.upper()}")
+        logger.info("[EMAIL] Successfully sent alert email to %s for %s", recipient_email, coin_id.upper())
         return True
         
     except Exception as e:
-        logger.error(f"[EMAIL] Failed to send alert email to {recipient_email}: {e}", exc_info=True)
+        logger.error("[EMAIL] Failed to send alert email to %s: %s", recipient_email, e, exc_info=True)
         return False
@@ -1,31 +1,82 @@
 import jwt
+import hashlib
 import os
 import logging
+import time
+from typing import NamedTuple, Optional
 from flask import current_app
 
+from app.utils.cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
 ALGORITHM = "HS256"
+# Built once so the hot path doesn't allocate the algorithm list or decoder per call
+_ALGORITHMS = [ALGORITHM]
+_jwt = jwt.PyJWT()
+DEFAULT_SECRET_KEY = "dev-secret-key-change-in-production"
+
+# Verified token payloads keyed by a digest of the raw token, so repeat requests
+# with the same bearer token skip the HMAC check and JSON decode
+TOKEN_CACHE_TTL = 60
+_token_cache = TTLCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL)
 
-def get_secret_key():
-    """Get SECRET_KEY from Flask app config, fallback to environment."""
+def get_secret_key() -> bytes:
+    """Get SECRET_KEY from Flask app config as bytes, resolved once per app.
+    
+    PyJWT accepts the key as bytes without re-encoding it on every decode.
+    """
     try:
-        return current_app.config.get('SECRET_KEY', os.environ.get("SECRET_KEY", "dev-secret-key-change-in-production"))
+        app = current_app._get_current_object()
     except RuntimeError:
-        # Outside of app context
-        return os.environ.get("SECRET_KEY", "dev-secret-key-change-in-production")
+        # No app context, fallback to environment variable
+        logger.warning("current_app not available, falling back to environment variable")
+        return _as_bytes(os.getenv('SECRET_KEY', DEFAULT_SECRET_KEY))
+    
+    secret = app.extensions.get('auth_secret_key')
+    if secret is None:
+        secret = _as_bytes(app.config.get('SECRET_KEY') or os.getenv('SECRET_KEY', DEFAULT_SECRET_KEY))
+        app.extensions['auth_secret_key'] = secret
+        logger.debug("Resolved SECRET_KEY for token verification")
+    return secret
+
+def _as_bytes(secret) -> bytes:
+    return secret if isinstance(secret, bytes) else secret.encode()
+
+def decode_token(token: str) -> dict:
+    """Verify a token, reusing the payload of a recently verified identical token.
+    
+    Entries never outlive the token's own ``exp`` claim.
+    
+    Raises:
+        jwt.InvalidTokenError: If the token is invalid or expired
+    """
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    payload = _token_cache.get(cache_key)
+    if payload is not None:
+        return payload
+    
+    payload = _jwt.decode(token, get_secret_key(), algorithms=_ALGORITHMS)
+    ttl = TOKEN_CACHE_TTL
+    exp = payload.get('exp')
+    if isinstance(exp, (int, float)):
+        ttl = min(ttl, exp - time.time())
+    if ttl > 0:
+        _token_cache.set(cache_key, payload, ttl=ttl)
+    return payload
+
+class TokenPayload(NamedTuple):
+    """The identity claims of a verified token."""
+    user_id: Optional[str]
+    username: Optional[str]
 
 class JWTService:
     @staticmethod
-    def verify_token(token: str) -> dict:
-        """Verify and decode a JWT token."""
+    def verify_token(token: str) -> Optional[TokenPayload]:
+        """Verify and decode a JWT token, returning its identity claims or None if invalid."""
         try:
-            secret_key = get_secret_key()
-            payload = jwt.decode(token, secret_key, algorithms=[ALGORITHM])
-            return {
-                'user_id': payload.get('user_id'),
-                'username': payload.get('username')
-            }
+            payload = decode_token(token)
+            return TokenPayload(payload.get('user_id'), payload.get('username'))
         except jwt.ExpiredSignatureError:
             logger.error("Token has expired")
             return None
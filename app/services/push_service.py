@@ -1,12 +1,53 @@
 import json
+import os
+import threading
 import requests
 import logging
+import orjson
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from flask import current_app
+from sqlalchemy import select, update
 from app.models import PushSubscription
-from app.extensions import db
-from app.utils.resilience import retry, circuit_breaker
+from app.extensions import db, push_executor
+from app.utils.cache import TTLCache
+from app.utils.resilience import CircuitBreaker, retry
 
 logger = logging.getLogger(__name__)
 
+def _build_session() -> requests.Session:
+    """Pooled keep-alive connections to push gateways, sized to the push executor."""
+    http = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=0)
+    http.mount('http://', adapter)
+    http.mount('https://', adapter)
+    return http
+
+session = _build_session()
+
+def _reset_session() -> None:
+    """Give a forked worker its own pool instead of sockets shared with the parent."""
+    global session
+    session = _build_session()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_session)
+
+# Gateway replies meaning the subscription has expired or been revoked
+_GONE_STATUSES = frozenset((404, 410))
+
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Push gateway origin -> its circuit breaker, so one failing provider doesn't
+# stop deliveries to the others
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+# user_id -> [(subscription_id, endpoint)] of active subscriptions. Changes made
+# in this process invalidate the user's entry; other workers see them after the TTL.
+_endpoints_cache = TTLCache(maxsize=10_000)
+
 def subscribe_to_push(user_id: str, subscription_data: dict) -> PushSubscription:
     """Store a push notification subscription for a user."""
     subscription = PushSubscription(
@@ -16,55 +57,225 @@ def subscribe_to_push(user_id: str, subscription_data: dict) -> PushSubscription
     )
     db.session.add(subscription)
     db.session.commit()
+    _endpoints_cache.pop(user_id)
     return subscription
 
 def get_user_subscriptions(user_id: str):
     """Get all active push subscriptions for a user."""
-    return PushSubscription.query.filter(
+    stmt = select(PushSubscription).where(
+        PushSubscription.user_id == user_id,
+        PushSubscription.is_active == True
+    )
+    return db.session.execute(stmt).scalars().all()
+
+def get_user_push_endpoints(user_id: str) -> List[Tuple[str, str]]:
+    """
+    Get (subscription_id, endpoint) for a user's active subscriptions.
+    
+    Results are cached for PUSH_SUBSCRIPTIONS_CACHE_TTL seconds, already parsed,
+    so repeat pushes to the same user skip both the query and the JSON decode.
+    """
+    endpoints = _endpoints_cache.get(user_id)
+    if endpoints is not None:
+        return endpoints
+    # Only the columns needed to deliver, not full ORM rows
+    stmt = select(PushSubscription.id, PushSubscription.subscription_data).where(
         PushSubscription.user_id == user_id,
         PushSubscription.is_active == True
-    ).all()
+    )
+    endpoints = []
+    malformed = set()
+    for subscription_id, subscription_data in db.session.execute(stmt):
+        endpoint = _endpoint(subscription_id, subscription_data)
+        if endpoint:
+            endpoints.append((subscription_id, endpoint))
+        else:
+            malformed.add(subscription_id)
+    if malformed:
+        _deactivate_subscriptions(malformed)
+    ttl = current_app.config.get('PUSH_SUBSCRIPTIONS_CACHE_TTL', 0)
+    if ttl > 0:
+        _endpoints_cache.set(user_id, endpoints, ttl=ttl)
+    return endpoints
+
+def _breaker_for(endpoint: str) -> CircuitBreaker:
+    """Get the circuit breaker for the endpoint's push gateway (one per origin)."""
+    origin = urlsplit(endpoint).netloc
+    breaker = _breakers.get(origin)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(origin)
+            if breaker is None:
+                breaker = _breakers[origin] = CircuitBreaker(
+                    failure_threshold=5, recovery_timeout=60, name=f"push_endpoint:{origin}"
+                )
+    return breaker
 
 @retry(max_attempts=2, delay=1)
-@circuit_breaker(failure_threshold=5, recovery_timeout=60, name="push_endpoint")
-def _send_push_to_endpoint(endpoint: str, payload: dict) -> None:
-    """Send push notification to endpoint with resilience."""
-    requests.post(endpoint, json=payload, timeout=5)
+def _send_push_to_endpoint(endpoint: str, payload: bytes) -> int:
+    """
+    Send an already-serialized JSON push payload to endpoint with resilience.
+    
+    Returns:
+        int: HTTP status of the gateway's reply; 5xx replies raise so they are retried
+    """
+    return _breaker_for(endpoint).call(_post_push, endpoint, payload)
+
+def _post_push(endpoint: str, payload: bytes) -> int:
+    status = session.post(endpoint, data=payload, headers=_JSON_HEADERS, timeout=5).status_code
+    if status >= 500:
+        raise requests.HTTPError("push gateway returned HTTP %d" % status)
+    return status
+
+# Shared by payloads without data; they are serialized straight away and never mutated
+_EMPTY_DATA = {}
+
+def _build_payload(title: str, body: str, data: dict = None) -> dict:
+    return {
+        "notification": {
+            "title": title,
+            "body": body,
+            "icon": "/crypto-icon.png",
+            "data": data or _EMPTY_DATA
+        }
+    }
+
+def _deliver(job: Tuple[str, str, bytes]) -> Optional[int]:
+    """Send one (subscription_id, endpoint, payload) job; returns the HTTP status, or None on error."""
+    subscription_id, endpoint, payload = job
+    try:
+        return _send_push_to_endpoint(endpoint, payload)
+    except Exception as e:
+        logger.warning("Failed to send push notification to subscription %s (%s): %s",
+                       subscription_id, urlsplit(endpoint).netloc, e)
+        return None
+
+def _endpoint(subscription_id: str, subscription_data: str) -> Optional[str]:
+    """Return the subscription's push URL, or None if the stored data can't be delivered to."""
+    try:
+        endpoint = orjson.loads(subscription_data).get('endpoint')
+    except (ValueError, AttributeError):
+        endpoint = None
+    if isinstance(endpoint, str) and endpoint.startswith(('https://', 'http://')):
+        return endpoint
+    logger.warning("Malformed push subscription %s", subscription_id)
+    return None
+
+def _fan_out(jobs: list, commit: bool = True) -> int:
+    """Deliver jobs via _deliver_all and return how many the gateways accepted."""
+    return sum(_deliver_all(jobs, commit))
+
+def _deliver_all(jobs: list, commit: bool = True) -> List[bool]:
+    """
+    Deliver jobs concurrently on the push executor, then settle the results in one pass.
+    
+    Subscriptions whose gateway reports them gone (404/410) are deactivated
+    with a single UPDATE.
+    
+    Args:
+        jobs: (subscription_id, endpoint, serialized payload) tuples
+        commit: Commit the deactivations; pass False when the caller owns the transaction
+    
+    Returns:
+        list: Whether each job's gateway accepted the push, in job order
+    """
+    if not jobs:
+        return []
+    if len(jobs) == 1:
+        statuses = [_deliver(jobs[0])]
+    else:
+        statuses = list(push_executor.map(_deliver, jobs))
+    
+    delivered = []
+    gone = set()
+    for (subscription_id, _, _), status in zip(jobs, statuses):
+        delivered.append(status is not None and 200 <= status < 300)
+        if status in _GONE_STATUSES:
+            gone.add(subscription_id)
+    if gone:
+        _deactivate_subscriptions(gone, commit)
+    return delivered
+
+def _deactivate_subscriptions(subscription_ids: set, commit: bool = True) -> None:
+    """Mark expired or malformed subscriptions inactive so they are not pushed to again."""
+    # One returned row per subscription actually switched off; IDs that are
+    # already inactive or gone don't match and aren't counted
+    user_ids = db.session.execute(
+        update(PushSubscription)
+        .where(PushSubscription.id.in_(subscription_ids), PushSubscription.is_active == True)
+        .values(is_active=False)
+        .returning(PushSubscription.user_id)
+        # Nothing in the session needs refreshing; skip the ORM's sync pass
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    if commit:
+        db.session.commit()
+    for user_id in set(user_ids):
+        _endpoints_cache.pop(user_id)
+    logger.info("Deactivated %d push subscriptions", len(user_ids))
 
 def send_push_notification(user_id: str, title: str, body: str, data: dict = None) -> bool:
     """Send a push notification to all active subscriptions for a user."""
-    subscriptions = get_user_subscriptions(user_id)
-    
-    if not subscriptions:
-        return False
-    
-    success = False
-    for sub in subscriptions:
-        try:
-            subscription_data = json.loads(sub.subscription_data)
-            endpoint = subscription_data.get('endpoint')
-            
-            if endpoint:
-                # Send notification payload
-                payload = {
-                    "notification": {
-                        "title": title,
-                        "body": body,
-                        "icon": "/crypto-icon.png",
-                        "data": data or {}
-                    }
-                }
-                
-                _send_push_to_endpoint(endpoint, payload)
-                success = True
-        except Exception as e:
-            logger.warning(f"Failed to send push notification: {e}")
-    return success
+    # Serialized once and shared by every subscription
+    payload = orjson.dumps(_build_payload(title, body, data))
+    jobs = [(subscription_id, endpoint, payload)
+            for subscription_id, endpoint in get_user_push_endpoints(user_id)]
+    return _fan_out(jobs) > 0
 
-def trigger_alert_push_notification(user_id: str, coin_id: str, current_price: float, threshold_price: float) -> bool:
-    """Trigger a push notification when an alert threshold is met."""
-    return send_push_notification(
-        user_id=user_id,
+def send_push_notifications_bulk(user_ids: Iterable[str], title: str, body: str,
+                                 data: dict = None) -> Dict[str, bool]:
+    """
+    Send the same push notification to many users at once.
+    
+    Loads every user's subscriptions with one query and delivers them all in a
+    single fan-out over the push executor.
+    
+    Returns:
+        dict: user_id -> True if at least one of the user's devices accepted the push
+    """
+    user_ids = set(user_ids)
+    results = dict.fromkeys(user_ids, False)
+    if not user_ids:
+        return results
+    
+    payload = orjson.dumps(_build_payload(title, body, data))
+    owners = []
+    jobs = []
+    for user_id, endpoints in _endpoints_by_user(user_ids).items():
+        for subscription_id, endpoint in endpoints:
+            owners.append(user_id)
+            jobs.append((subscription_id, endpoint, payload))
+    
+    for user_id, delivered in zip(owners, _deliver_all(jobs)):
+        if delivered:
+            results[user_id] = True
+    return results
+
+def _endpoints_by_user(user_ids: set, commit: bool = True) -> Dict[str, List[Tuple[str, str]]]:
+    """
+    Load (subscription_id, endpoint) for the active subscriptions of many users in one query.
+    
+    Subscriptions with no usable endpoint are deactivated in one UPDATE rather
+    than being skipped again on every send.
+    """
+    stmt = select(PushSubscription.id, PushSubscription.user_id, PushSubscription.subscription_data).where(
+        PushSubscription.user_id.in_(user_ids),
+        PushSubscription.is_active == True
+    )
+    endpoints_by_user = {}
+    malformed = set()
+    for subscription_id, user_id, subscription_data in db.session.execute(stmt):
+        endpoint = _endpoint(subscription_id, subscription_data)
+        if endpoint:
+            endpoints_by_user.setdefault(user_id, []).append((subscription_id, endpoint))
+        else:
+            malformed.add(subscription_id)
+    if malformed:
+        _deactivate_subscriptions(malformed, commit)
+    return endpoints_by_user
+
+def _alert_message(coin_id: str, current_price: float, threshold_price: float) -> dict:
+    return _build_payload(
         title="Price Alert Triggered!",
         body=f"{coin_id.upper()} reached ${current_price:.2f}",
         data={
@@ -73,3 +284,37 @@ def trigger_alert_push_notification(user_id: str, coin_id: str, current_price: f
             "threshold_price": threshold_price
         }
     )
+
+def trigger_alert_push_notification(user_id: str, coin_id: str, current_price: float, threshold_price: float) -> bool:
+    """Trigger a push notification when an alert threshold is met."""
+    return trigger_alert_push_notifications([(user_id, coin_id, current_price, threshold_price)]) > 0
+
+def trigger_alert_push_notifications(triggered: Iterable[Tuple[str, str, float, float]],
+                                     commit: bool = True) -> int:
+    """
+    Push notifications for a batch of triggered alerts in parallel.
+    
+    Subscriptions for every user in the batch are loaded with one query, then
+    all deliveries fan out over the push executor, so the batch takes roughly
+    one gateway round-trip rather than one per subscription.
+    
+    Args:
+        triggered: (user_id, coin_id, current_price, threshold_price) tuples
+        commit: Commit deactivations of expired subscriptions (False inside a caller's transaction)
+    
+    Returns:
+        int: Number of pushes delivered successfully
+    """
+    triggered = list(triggered)
+    if not triggered:
+        return 0
+    
+    endpoints_by_user = _endpoints_by_user({t[0] for t in triggered}, commit)
+    
+    jobs = []
+    for user_id, coin_id, current_price, threshold_price in triggered:
+        payload = orjson.dumps(_alert_message(coin_id, current_price, threshold_price))
+        jobs.extend((subscription_id, endpoint, payload)
+                    for subscription_id, endpoint in endpoints_by_user.get(user_id, ()))
+    
+    return _fan_out(jobs, commit)
@@ -0,0 +1,41 @@
+"""Helpers for running work off the request thread on the shared executor."""
+
+import logging
+
+from app.extensions import executor
+
+logger = logging.getLogger(__name__)
+
+
+def submit_task(app, func, *args, **kwargs):
+    """
+    Run ``func(*args, **kwargs)`` inside an app context on the background executor.
+    
+    When ``TASKS_EAGER`` is enabled (e.g. under tests) the task runs inline instead.
+    
+    Args:
+        app: Flask application instance (not the ``current_app`` proxy)
+        func: Callable to execute
+    
+    Returns:
+        The Future for the submitted task, or None when run eagerly
+    """
+    return submit_task_to(executor, app, func, *args, **kwargs)
+
+
+def submit_task_to(pool, app, func, *args, **kwargs):
+    """Like submit_task, but on the given executor (e.g. a dedicated I/O pool)."""
+    if app.config.get('TASKS_EAGER', False):
+        _run_task(app, func, args, kwargs)
+        return None
+    return pool.submit(_run_task, app, func, args, kwargs)
+
+
+def _run_task(app, func, args, kwargs):
+    """Execute a task in an app context, logging any failure."""
+    with app.app_context():
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            logger.exception("[TASK] Background task %s failed", getattr(func, "__name__", func))
+            return None
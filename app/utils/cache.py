@@ -0,0 +1,55 @@
+"""Small in-process caching utilities."""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe bounded cache whose entries expire after a time-to-live."""
+    
+    def __init__(self, maxsize=1024, ttl=60.0):
+        """
+        Args:
+            maxsize: Maximum number of entries; the oldest are evicted first
+            ttl: Default time-to-live in seconds for new entries
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            return value
+    
+    def set(self, key, value, ttl=None):
+        """Store value under key for ttl seconds (defaults to the cache's TTL)."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key, default=None):
+        """Remove key and return its value (expired or not), or default."""
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[1]
+    
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,65 @@
+"""JSON log formatting so structured ``extra=`` fields reach log shippers intact."""
+
+import atexit
+import copy
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
+# Attributes every LogRecord has; anything else on a record came from ``extra=``
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None)).keys()) | {'message', 'asctime'}
+
+
+class JsonLogFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class _RecordQueueHandler(QueueHandler):
+    """Queue records for the listener thread, keeping ``extra`` fields and exc_info intact.
+    
+    The stock QueueHandler pre-formats records (so they can be pickled); the queue
+    here is in-process, so only the message is frozen and the JSON formatting and
+    stderr write happen on the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_json_logging(level: int = logging.INFO) -> None:
+    """Route root logging through a single JSON formatter on stderr (idempotent).
+    
+    Records are handed to a background QueueListener, so request and worker
+    threads don't block on formatting or on writing to stderr.
+    """
+    root = logging.getLogger()
+    if any(isinstance(h, _RecordQueueHandler) for h in root.handlers):
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonLogFormatter())
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, handler)
+    listener.start()
+    # Flush whatever is still queued when the process exits
+    atexit.register(listener.stop)
+    root.handlers = [_RecordQueueHandler(records)]
+    root.setLevel(level)
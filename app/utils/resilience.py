@@ -1,7 +1,9 @@
 """Resilience utilities for fault tolerance: Circuit Breaker and Retry patterns."""
 
 import time
+import random
 import logging
+import threading
 from functools import wraps
 from enum import Enum
 
@@ -15,55 +17,118 @@ class CircuitState(Enum):
     HALF_OPEN = "half_open"  # Testing if service recovered
 
 
+class CircuitOpenError(Exception):
+    """Raised instead of calling through while a circuit is open."""
+
+
 class CircuitBreaker:
-    """Simple circuit breaker implementation."""
+    """Thread-safe three-state circuit breaker.
+    
+    CLOSED counts consecutive failures and opens at ``failure_threshold``.
+    After ``recovery_timeout`` an OPEN circuit goes HALF_OPEN and lets at most
+    ``half_open_max_calls`` concurrent trial calls through; ``success_threshold``
+    successes close it again, while any failure re-opens it.
+    """
     
-    def __init__(self, failure_threshold=5, recovery_timeout=60, name="circuit"):
+    def __init__(self, failure_threshold=5, recovery_timeout=60, name="circuit",
+                 success_threshold=2, half_open_max_calls=3, ignore=None):
         """
         Args:
-            failure_threshold: Number of failures before opening circuit
+            failure_threshold: Number of consecutive failures before opening circuit
             recovery_timeout: Seconds before attempting recovery
             name: Circuit breaker name for logging
+            success_threshold: Successful trial calls needed to close from HALF_OPEN
+            half_open_max_calls: Concurrent trial calls allowed while HALF_OPEN
+            ignore: Optional predicate; an exception for which it returns True is
+                re-raised but counts as a success, since the service did answer
+                (e.g. a 4xx reply to a bad request)
         """
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
         self.name = name
+        self.success_threshold = success_threshold
+        self.half_open_max_calls = half_open_max_calls
+        self.ignore = ignore
         self.failure_count = 0
+        self.success_count = 0
         self.last_failure_time = None
         self.state = CircuitState.CLOSED
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
     
     def call(self, func, *args, **kwargs):
         """Execute function with circuit breaker protection."""
-        if self.state == CircuitState.OPEN:
-            if time.time() - self.last_failure_time >= self.recovery_timeout:
-                self.state = CircuitState.HALF_OPEN
-                logger.info(f"Circuit '{self.name}' entering HALF_OPEN state")
-            else:
-                raise Exception(f"Circuit '{self.name}' is OPEN")
-        
+        trial = self._before_call()
         try:
             result = func(*args, **kwargs)
-            if self.state == CircuitState.HALF_OPEN:
-                self.state = CircuitState.CLOSED
-                self.failure_count = 0
-                logger.info(f"Circuit '{self.name}' closed - service recovered")
-            return result
         except Exception as e:
-            self.failure_count += 1
-            self.last_failure_time = time.time()
+            if self.ignore is not None and self.ignore(e):
+                self._on_success(trial)
+            else:
+                self._on_failure()
+            raise
+        self._on_success(trial)
+        return result
+    
+    def _before_call(self):
+        """Admit a call or raise if the circuit is open; returns True for a half-open trial call."""
+        # Fast path: a CLOSED circuit admits everything without taking the lock or
+        # reading the clock. A call racing a concurrent trip simply goes through.
+        if self.state is CircuitState.CLOSED:
+            return False
+        with self._lock:
+            if self.state == CircuitState.OPEN:
+                if time.monotonic() - self.last_failure_time < self.recovery_timeout:
+                    raise CircuitOpenError(f"Circuit '{self.name}' is OPEN")
+                self.state = CircuitState.HALF_OPEN
+                self.success_count = 0
+                self._half_open_calls = 0
+                logger.info(f"Circuit '{self.name}' entering HALF_OPEN state")
             
-            if self.failure_count >= self.failure_threshold:
+            if self.state == CircuitState.HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    raise CircuitOpenError(f"Circuit '{self.name}' is OPEN (half-open trial limit reached)")
+                self._half_open_calls += 1
+                return True
+            return False
+    
+    def _on_success(self, trial=False):
+        if not trial:
+            # Healthy CLOSED traffic: only lock when there is a failure streak to reset
+            if self.failure_count:
+                with self._lock:
+                    self.failure_count = 0
+            return
+        with self._lock:
+            if self.state == CircuitState.HALF_OPEN:
+                self._half_open_calls -= 1
+                self.success_count += 1
+                if self.success_count >= self.success_threshold:
+                    self.state = CircuitState.CLOSED
+                    self.failure_count = 0
+                    logger.info(f"Circuit '{self.name}' closed - service recovered")
+    
+    def _on_failure(self):
+        with self._lock:
+            self.last_failure_time = time.monotonic()
+            if self.state == CircuitState.HALF_OPEN:
                 self.state = CircuitState.OPEN
-                logger.error(f"Circuit '{self.name}' opened after {self.failure_count} failures")
+                logger.error(f"Circuit '{self.name}' re-opened - trial call failed")
+                return
             
-            raise
+            self.failure_count += 1
+            if self.state == CircuitState.CLOSED and self.failure_count >= self.failure_threshold:
+                self.state = CircuitState.OPEN
+                logger.error(f"Circuit '{self.name}' opened after {self.failure_count} failures")
 
 
-def circuit_breaker(failure_threshold=5, recovery_timeout=60, name=None):
+def circuit_breaker(failure_threshold=5, recovery_timeout=60, name=None,
+                    success_threshold=2, half_open_max_calls=3, ignore=None):
     """Decorator for circuit breaker pattern."""
     def decorator(func):
         breaker_name = name or func.__name__
-        breaker = CircuitBreaker(failure_threshold, recovery_timeout, breaker_name)
+        breaker = CircuitBreaker(failure_threshold, recovery_timeout, breaker_name,
+                                 success_threshold, half_open_max_calls, ignore)
         
         @wraps(func)
         def wrapper(*args, **kwargs):
@@ -73,7 +138,8 @@ def circuit_breaker(failure_threshold=5, recovery_timeout=60, name=None):
     return decorator
 
 
-def retry(max_attempts=3, delay=1, backoff=2):
+def retry(max_attempts=3, delay=1, backoff=2, max_delay=None, jitter=True,
+          retry_on=(Exception,), giveup=None, non_retryable=(CircuitOpenError,)):
     """
     Decorator for retry pattern with exponential backoff.
     
@@ -81,8 +147,17 @@ def retry(max_attempts=3, delay=1, backoff=2):
         max_attempts: Maximum number of retry attempts
         delay: Initial delay in seconds
         backoff: Multiplier for exponential backoff
+        max_delay: Upper bound on a single delay in seconds (None for no cap)
+        jitter: Sleep a random 50-150% of each delay so concurrent callers don't retry in lockstep
+        retry_on: Exception types that are retried; anything else is raised immediately
+        giveup: Optional predicate; an exception for which it returns True is raised immediately
+        non_retryable: Exception types raised immediately even if they match retry_on
+            (by default an open circuit, so callers fail fast instead of sleeping)
     """
     def decorator(func):
+        # Own RNG per decorated function, so retrying threads don't share the global one
+        rng = random.Random()
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             attempt = 1
@@ -91,16 +166,21 @@ def retry(max_attempts=3, delay=1, backoff=2):
             while attempt <= max_attempts:
                 try:
                     return func(*args, **kwargs)
-                except Exception as e:
+                except retry_on as e:
+                    if isinstance(e, non_retryable) or (giveup is not None and giveup(e)):
+                        raise
                     if attempt == max_attempts:
                         logger.error(f"{func.__name__} failed after {max_attempts} attempts")
                         raise
                     
+                    if max_delay is not None:
+                        current_delay = min(current_delay, max_delay)
+                    sleep_for = rng.uniform(0.5 * current_delay, 1.5 * current_delay) if jitter else current_delay
                     logger.warning(
-                        f"{func.__name__} failed (attempt {attempt}/{max_attempts}), "
-                        f"retrying in {current_delay}s: {str(e)}"
+                        "%s failed (attempt %d/%d), retrying in %.2fs: %s",
+                        func.__name__, attempt, max_attempts, sleep_for, e
                     )
-                    time.sleep(current_delay)
+                    time.sleep(sleep_for)
                     current_delay *= backoff
                     attempt += 1
             
@@ -1,6 +1,7 @@
 import pytest
 import os
 from app import create_app, db
+from app.config import TestingConfig
 from app.models.models import Alert, AlertTriggerHistory
 
 
@@ -32,24 +33,24 @@ def runner(app):
     return app.test_cli_runner()
 
 
-@pytest.fixture
-def valid_token(app):
-    """Generate a valid JWT token for testing."""
+@pytest.fixture(scope='session')
+def valid_token():
+    """Generate a valid JWT token once for the whole test session.
+    
+    Signed with the testing config's SECRET_KEY, which every test app loads.
+    """
     import jwt
     from datetime import datetime, timedelta, timezone
     
-    with app.app_context():
-        secret_key = app.config.get('SECRET_KEY')
-        payload = {
-            'user_id': 'test-user-123',
-            'sub': 'test-user@example.com',
-            'exp': datetime.now(timezone.utc) + timedelta(hours=1)
-        }
-        token = jwt.encode(payload, secret_key, algorithm='HS256')
-        return token
+    payload = {
+        'user_id': 'test-user-123',
+        'sub': 'test-user@example.com',
+        'exp': datetime.now(timezone.utc) + timedelta(hours=1)
+    }
+    return jwt.encode(payload, TestingConfig.SECRET_KEY, algorithm='HS256')
 
 
-@pytest.fixture
+@pytest.fixture(scope='session')
 def auth_headers(valid_token):
     """Return authorization headers with valid token."""
     return {'Authorization': f'Bearer {valid_token}'}
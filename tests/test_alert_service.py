@@ -0,0 +1,119 @@
+"""Tests for the alert service batch check."""
+from app import db
+from app.models import Alert
+from app.services.alert_service import check_all_alerts
+
+
+def _add_alert(coin_id, threshold_price, is_active=True):
+    alert = Alert(user_id='test-user-123', coin_id=coin_id,
+                  threshold_price=threshold_price, is_active=is_active)
+    db.session.add(alert)
+    db.session.commit()
+    return alert.id
+
+
+def test_check_all_alerts_fetches_each_coin_once(app, monkeypatch):
+    """Test the batch check looks up each distinct coin once and reports triggers."""
+    calls = []
+    prices = {'bitcoin': 60000.0, 'ethereum': 1000.0}
+
+    def fake_price(coin_id):
+        calls.append(coin_id)
+        return prices.get(coin_id)
+    monkeypatch.setattr('app.services.coin_service.get_coin_price', fake_price)
+
+    hit = _add_alert('bitcoin', 50000)
+    _add_alert('bitcoin', 70000)
+    _add_alert('ethereum', 2000)
+    _add_alert('dogecoin', 1, is_active=False)
+
+    triggered = check_all_alerts(app)
+
+    assert triggered == [hit]
+    assert sorted(calls) == ['bitcoin', 'ethereum']
+
+
+def test_created_at_is_set_per_row(app):
+    """Test timestamps are taken at insert time rather than once at import."""
+    first = db.session.get(Alert, _add_alert('bitcoin', 1))
+    second = db.session.get(Alert, _add_alert('bitcoin', 1))
+    assert first.created_at < second.created_at
+
+
+def test_check_all_alerts_spans_chunks(app, monkeypatch):
+    """Test alerts split across several chunks are all checked, each coin fetched once."""
+    calls = []
+    monkeypatch.setattr('app.services.alert_service.BATCH_CHUNK_SIZE', 2)
+    monkeypatch.setattr('app.services.coin_service.get_coin_price',
+                        lambda coin_id: calls.append(coin_id) or 10.0)
+
+    ids = [_add_alert('bitcoin', 5) for _ in range(5)]
+
+    assert sorted(check_all_alerts(app)) == sorted(ids)
+    assert calls == ['bitcoin']
+
+
+def test_check_all_alerts_pushes_triggered_alerts(app, monkeypatch):
+    """Test triggered alerts are pushed to every active subscription and gone ones are dropped."""
+    import json
+    from app.models import PushSubscription
+    sent = []
+    app.config['ENABLE_PUSH'] = True
+    monkeypatch.setattr('app.services.coin_service.get_coin_price', lambda coin_id: 10.0)
+    monkeypatch.setattr('app.services.push_service._send_push_to_endpoint',
+                        lambda endpoint, payload: sent.append((endpoint, json.loads(payload)['notification']['body']))
+                        or (410 if endpoint.endswith('/b') else 201))
+    for endpoint, is_active in (('https://push/a', True), ('https://push/b', True), ('https://push/c', False)):
+        db.session.add(PushSubscription(user_id='test-user-123', is_active=is_active,
+                                        subscription_data=json.dumps({'endpoint': endpoint})))
+    _add_alert('bitcoin', 5)
+
+    check_all_alerts(app)
+
+    assert sorted(sent) == [('https://push/a', 'BITCOIN reached $10.00'),
+                            ('https://push/b', 'BITCOIN reached $10.00')]
+    db.session.rollback()
+    assert PushSubscription.query.filter_by(is_active=True).count() == 1
+
+
+def test_check_all_alerts_pushes_each_trigger_once(app, monkeypatch):
+    """Test a pushed alert is deactivated so later batch checks don't push it again."""
+    import json
+    from app.models import PushSubscription
+    sent = []
+    app.config['ENABLE_PUSH'] = True
+    monkeypatch.setattr('app.services.coin_service.get_coin_price', lambda coin_id: 10.0)
+    monkeypatch.setattr('app.services.push_service._send_push_to_endpoint',
+                        lambda endpoint, payload: sent.append(endpoint) or 201)
+    db.session.add(PushSubscription(user_id='test-user-123',
+                                    subscription_data=json.dumps({'endpoint': 'https://push/a'})))
+    alert_id = _add_alert('bitcoin', 5)
+
+    assert check_all_alerts(app) == [alert_id]
+    assert check_all_alerts(app) == []
+
+    assert sent == ['https://push/a']
+    db.session.expire_all()
+    assert db.session.get(Alert, alert_id).is_active is False
+
+
+def test_push_deactivates_expired_subscriptions(app, monkeypatch):
+    """Test gone subscriptions are deactivated and dropped from the cached endpoints."""
+    from app.services import push_service
+    app.config['PUSH_SUBSCRIPTIONS_CACHE_TTL'] = 60
+    push_service._endpoints_cache.clear()
+    statuses = {'https://push/ok': 201, 'https://push/gone': 410}
+    sent = []
+    monkeypatch.setattr('app.services.push_service._send_push_to_endpoint',
+                        lambda endpoint, payload: sent.append(endpoint) or statuses[endpoint])
+    for endpoint in statuses:
+        push_service.subscribe_to_push('test-user-123', {'endpoint': endpoint})
+
+    try:
+        assert push_service.send_push_notification('test-user-123', 'title', 'body') is True
+        assert sorted(sent) == sorted(statuses)
+        sent.clear()
+        assert push_service.send_push_notification('test-user-123', 'title', 'body') is True
+        assert sent == ['https://push/ok']
+    finally:
+        push_service._endpoints_cache.clear()
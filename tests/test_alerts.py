@@ -0,0 +1,174 @@
+"""Tests for alert API endpoints."""
+import pytest
+import jwt
+from datetime import datetime, timedelta, timezone
+
+
+@pytest.fixture
+def user_headers(app):
+    """Authorization headers for a token that carries the user's email."""
+    payload = {
+        'user_id': 'test-user-123',
+        'username': 'test-user@example.com',
+        'exp': datetime.now(timezone.utc) + timedelta(hours=1)
+    }
+    token = jwt.encode(payload, app.config['SECRET_KEY'], algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture(autouse=True)
+def no_pricing_service(monkeypatch):
+    """Keep tests off the network by stubbing the pricing-service lookup."""
+    monkeypatch.setattr('app.services.alert_service.get_coin_price', lambda coin_id: None)
+
+
+def test_set_alert_requires_auth(client):
+    """Test set-alert rejects requests without a token."""
+    response = client.post('/api/set-alert', json={'coin_id': 'bitcoin', 'threshold_price': 1})
+    assert response.status_code == 401
+
+
+def test_set_alert_missing_fields(client, user_headers):
+    """Test set-alert rejects bodies missing required fields."""
+    response = client.post('/api/set-alert', json={'coin_id': 'bitcoin'}, headers=user_headers)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Missing required fields: coin_id, threshold_price'
+
+
+def test_set_alert_rejects_non_positive_threshold(client, user_headers):
+    """Test set-alert rejects a threshold of zero or less."""
+    response = client.post('/api/set-alert', json={'coin_id': 'bitcoin', 'threshold_price': 0},
+                           headers=user_headers)
+    assert response.status_code == 400
+
+
+def test_set_and_get_alerts(client, user_headers):
+    """Test a created alert is returned by the alerts listing."""
+    response = client.post('/api/set-alert', json={'coin_id': ' Bitcoin ', 'threshold_price': 50000},
+                           headers=user_headers)
+    assert response.status_code == 201
+    created = response.get_json()
+    assert created['coin_id'] == 'bitcoin'
+    assert created['threshold_price'] == 50000
+    assert created['is_active'] is True
+
+    response = client.get('/api/alerts', headers=user_headers)
+    assert response.status_code == 200
+    alerts = response.get_json()['alerts']
+    assert [a['id'] for a in alerts] == [created['id']]
+    assert alerts[0]['created_at'] == created['created_at']
+
+
+def test_delete_alert(client, user_headers):
+    """Test deactivating an alert removes it from the listing."""
+    created = client.post('/api/set-alert', json={'coin_id': 'bitcoin', 'threshold_price': 1},
+                          headers=user_headers).get_json()
+
+    response = client.delete(f"/api/alerts/{created['id']}", headers=user_headers)
+    assert response.status_code == 204
+    assert response.data == b''
+    assert client.get('/api/alerts', headers=user_headers).get_json()['alerts'] == []
+
+    response = client.delete('/api/alerts/does-not-exist', headers=user_headers)
+    assert response.status_code == 404
+
+
+def test_check_alerts_is_accepted(client):
+    """Test the batch check endpoint queues the check and returns 202."""
+    response = client.post('/api/check-alerts')
+    assert response.status_code == 202
+    assert response.get_json()['message'] == 'Alert check accepted'
+
+
+def test_set_alert_invalid_threshold_value(client, user_headers):
+    """Test a non-numeric threshold is reported as a 400."""
+    response = client.post('/api/set-alert', json={'coin_id': 'bitcoin', 'threshold_price': 'abc'},
+                           headers=user_headers)
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Invalid value:')
+
+
+def test_unexpected_error_returns_generic_500(client, user_headers, monkeypatch):
+    """Test unhandled errors do not leak exception details."""
+    def boom(user_id):
+        raise RuntimeError('db password is hunter2')
+    monkeypatch.setattr('app.api.alerts_views.get_user_alerts_rows', boom)
+
+    response = client.get('/api/alerts', headers=user_headers)
+    assert response.status_code == 500
+    assert response.get_json() == {'error': 'Internal server error'}
+
+
+def test_set_alert_non_json_body(client, user_headers):
+    """Test a body that is not JSON is treated as missing fields."""
+    response = client.post('/api/set-alert', data='coin_id=bitcoin', headers=user_headers)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Missing required fields: coin_id, threshold_price'
+
+
+def test_set_alert_triggers_when_threshold_already_met(client, user_headers, monkeypatch):
+    """Test the post-create check notifies when the price is already above threshold."""
+    from app.models import AlertTriggerHistory
+    sent = []
+    monkeypatch.setattr('app.services.alert_service.get_coin_price', lambda coin_id: 60000.0)
+    monkeypatch.setattr('app.services.alert_service.send_alert_email',
+                        lambda **kwargs: sent.append(kwargs) or True)
+
+    response = client.post('/api/set-alert', json={'coin_id': 'bitcoin', 'threshold_price': 50000},
+                           headers=user_headers)
+    assert response.status_code == 201
+    assert sent[0]['recipient_email'] == 'test-user@example.com'
+    history = AlertTriggerHistory.query.all()
+    assert [h.alert_id for h in history] == [response.get_json()['id']]
+
+
+def test_set_alert_skips_check_when_cached_price_below_threshold(client, app, user_headers, monkeypatch):
+    """Test a fresh cached price below the threshold avoids queueing the immediate check."""
+    from app.services import coin_service
+    queued = []
+    app.config['PRICE_CACHE_TTL'] = 10
+    coin_service._price_cache.set('bitcoin', 40000.0)
+    monkeypatch.setattr('app.api.alerts_views.submit_task', lambda *args: queued.append(args))
+
+    try:
+        client.post('/api/set-alert', json={'coin_id': 'bitcoin', 'threshold_price': 50000}, headers=user_headers)
+        assert queued == []
+        client.post('/api/set-alert', json={'coin_id': 'bitcoin', 'threshold_price': 30000}, headers=user_headers)
+        assert len(queued) == 1
+    finally:
+        coin_service._price_cache.clear()
+
+
+def test_get_alerts_streams_across_chunks(client, user_headers, monkeypatch):
+    """Test the streamed listing is valid JSON when it spans several chunks."""
+    monkeypatch.setattr('app.services.alert_service.USER_ALERTS_CHUNK_SIZE', 2)
+    ids = [client.post('/api/set-alert', json={'coin_id': 'bitcoin', 'threshold_price': i + 1},
+                       headers=user_headers).get_json()['id'] for i in range(5)]
+
+    response = client.get('/api/alerts', headers=user_headers)
+    assert response.status_code == 200
+    assert sorted(a['id'] for a in response.get_json()['alerts']) == sorted(ids)
+
+
+def test_get_alerts_cache_is_invalidated_by_writes(client, app, user_headers, monkeypatch):
+    """Test the cached listing is reused and dropped when the user's alerts change."""
+    from app.services import alert_service
+    app.config['USER_ALERTS_CACHE_TTL'] = 30
+    alert_service._user_alerts_cache.clear()
+    queries = []
+    real_rows = alert_service.get_user_alerts_rows
+    monkeypatch.setattr('app.api.alerts_views.get_user_alerts_rows',
+                        lambda user_id: queries.append(user_id) or real_rows(user_id))
+
+    try:
+        created = client.post('/api/set-alert', json={'coin_id': 'bitcoin', 'threshold_price': 1},
+                              headers=user_headers).get_json()
+        first = client.get('/api/alerts', headers=user_headers).get_json()
+        assert client.get('/api/alerts', headers=user_headers).get_json() == first
+        assert len(queries) == 1
+
+        client.delete(f"/api/alerts/{created['id']}", headers=user_headers)
+        assert client.get('/api/alerts', headers=user_headers).get_json()['alerts'] == []
+        assert len(queries) == 2
+    finally:
+        alert_service._user_alerts_cache.clear()
@@ -0,0 +1,44 @@
+"""Tests for the JWT authentication middleware."""
+import jwt
+from datetime import datetime, timedelta, timezone
+
+
+def test_repeat_token_is_verified_once(client, app, monkeypatch):
+    """Test a reused bearer token is served from the verification cache."""
+    from app.services import jwt_service
+    jwt_service._token_cache.clear()
+    calls = []
+    real_decode = jwt_service._jwt.decode
+    monkeypatch.setattr(jwt_service._jwt, 'decode',
+                        lambda *a, **kw: calls.append(1) or real_decode(*a, **kw))
+
+    token = jwt.encode({'user_id': 'u1', 'username': 'u1@example.com',
+                        'exp': datetime.now(timezone.utc) + timedelta(hours=1)},
+                       app.config['SECRET_KEY'], algorithm='HS256')
+    headers = {'Authorization': f'Bearer {token}'}
+    assert client.get('/api/alerts', headers=headers).status_code == 200
+    assert client.get('/api/alerts', headers=headers).status_code == 200
+    assert len(calls) == 1
+
+
+def test_malformed_authorization_header(client, auth_headers):
+    """Test non-Bearer schemes and empty or multi-part tokens are rejected."""
+    token = auth_headers['Authorization'][7:]
+    for header in (f'Basic {token}', 'Bearer ', f'Bearer {token} extra', token):
+        response = client.get('/api/alerts', headers={'Authorization': header})
+        assert response.status_code == 401
+        assert response.get_json()['message'] == 'Invalid Authorization header format'
+
+    response = client.get('/api/alerts', headers={'Authorization': f'bearer {token}'})
+    assert response.status_code == 200
+
+
+def test_verify_token_returns_identity_claims(app):
+    """Test verify_token exposes user_id/username and rejects a bad signature."""
+    from app.services.jwt_service import JWTService
+    claims = {'user_id': 'u1', 'username': 'u1@example.com',
+              'exp': datetime.now(timezone.utc) + timedelta(hours=1)}
+
+    payload = JWTService.verify_token(jwt.encode(claims, app.config['SECRET_KEY'], algorithm='HS256'))
+    assert (payload.user_id, payload.username) == ('u1', 'u1@example.com')
+    assert JWTService.verify_token(jwt.encode(claims, 'wrong-secret-' * 4, algorithm='HS256')) is None
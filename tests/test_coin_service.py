@@ -0,0 +1,239 @@
+"""Tests for the pricing-service client."""
+import pytest
+
+from app.services import coin_service
+from app.utils.resilience import CircuitOpenError
+
+
+def test_get_coin_price_caches_successful_lookups(app, monkeypatch):
+    """Test a fetched price is reused within PRICE_CACHE_TTL and failures are not cached."""
+    coin_service._price_cache.clear()
+    app.config['PRICE_CACHE_TTL'] = 10
+    calls = []
+
+    def fake_fetch(url):
+        calls.append(url)
+        if url.endswith('/bitcoin'):
+            return {'status': 'success', 'data': {'current_price': 60000.0}}
+        raise RuntimeError('Connection refused')
+    monkeypatch.setattr(coin_service, '_fetch_coin_price', fake_fetch)
+
+    assert coin_service.get_coin_price('bitcoin') == 60000.0
+    assert coin_service.get_coin_price('bitcoin') == 60000.0
+    assert coin_service.get_coin_price('ethereum') is None
+    assert coin_service.get_coin_price('ethereum') is None
+    assert len(calls) == 3
+    coin_service._price_cache.clear()
+
+
+def test_get_coin_price_rejects_non_numeric_price(app, monkeypatch):
+    """Test a non-numeric current_price is treated as no price and never cached."""
+    coin_service._price_cache.clear()
+    coin_service._stale_prices.clear()
+    app.config['PRICE_CACHE_TTL'] = 10
+    app.config['PRICE_STALE_TTL'] = 300
+    monkeypatch.setattr(coin_service, '_fetch_coin_price',
+                        lambda url: {'status': 'success', 'data': {'current_price': 'n/a'}})
+
+    assert coin_service.get_coin_price('bitcoin') is None
+    assert coin_service._price_cache.get('bitcoin') is None
+    assert coin_service._stale_prices.get('bitcoin') is None
+
+
+def test_get_coin_prices_uses_batch_endpoint(app, monkeypatch):
+    """Test several uncached coins are fetched with one batch request when configured."""
+    app.config['PRICING_BATCH_PATH'] = '/api/coins'
+    urls = []
+
+    def fake_fetch(url):
+        urls.append(url)
+        return {'status': 'success', 'data': [{'id': 'bitcoin', 'current_price': 60000.0},
+                                              {'id': 'ethereum', 'current_price': 3000.0}]}
+    monkeypatch.setattr(coin_service, '_fetch_coin_price', fake_fetch)
+
+    prices = coin_service.get_coin_prices(['bitcoin', 'ethereum', 'dogecoin', 'bitcoin'])
+
+    assert prices == {'bitcoin': 60000.0, 'ethereum': 3000.0, 'dogecoin': None}
+    assert len(urls) == 1 and urls[0].endswith('/api/coins?ids=bitcoin,dogecoin,ethereum')
+
+
+def test_get_coin_prices_falls_back_when_batch_fails(app, monkeypatch):
+    """Test a failed batch request falls back to per-coin lookups."""
+    app.config['PRICING_BATCH_PATH'] = '/api/coins'
+
+    def fake_fetch(url):
+        if '?ids=' in url:
+            raise RuntimeError('404 Not Found')
+        return {'status': 'success', 'data': {'current_price': 1.0}}
+    monkeypatch.setattr(coin_service, '_fetch_coin_price', fake_fetch)
+
+    assert coin_service.get_coin_prices(['bitcoin', 'ethereum']) == {'bitcoin': 1.0, 'ethereum': 1.0}
+
+
+@pytest.mark.parametrize('body', [
+    ['not', 'a', 'dict'],
+    {'status': 'success', 'data': None},
+    {'status': 'success', 'data': {'bitcoin': 5, 'ethereum': 'x'}},
+    {'status': 'success'},
+])
+def test_get_coin_prices_falls_back_on_malformed_batch_body(app, monkeypatch, body):
+    """Test a batch reply with an unexpected shape falls back to per-coin lookups."""
+    app.config['PRICING_BATCH_PATH'] = '/api/coins'
+    urls = []
+
+    def fake_fetch(url):
+        urls.append(url)
+        if '?ids=' in url:
+            return body
+        return {'status': 'success', 'data': {'current_price': 1.0}}
+    monkeypatch.setattr(coin_service, '_fetch_coin_price', fake_fetch)
+
+    assert coin_service.get_coin_prices(['bitcoin', 'ethereum']) == {'bitcoin': 1.0, 'ethereum': 1.0}
+    assert len(urls) == 3
+
+
+def test_get_coin_prices_skips_non_numeric_batch_prices(app, monkeypatch):
+    """Test a non-numeric batch price counts as no price and the base URL's slash is trimmed."""
+    app.config['PRICING_SERVICE_URL'] = 'http://pricing/'
+    app.config['PRICING_BATCH_PATH'] = '/api/coins'
+    urls = []
+
+    def fake_fetch(url):
+        urls.append(url)
+        return {'status': 'success', 'data': {'bitcoin': {'current_price': 'n/a'},
+                                              'ethereum': {'current_price': 2.0}}}
+    monkeypatch.setattr(coin_service, '_fetch_coin_price', fake_fetch)
+
+    assert coin_service.get_coin_prices(['bitcoin', 'ethereum']) == {'bitcoin': None, 'ethereum': 2.0}
+    assert urls == ['http://pricing/api/coins?ids=bitcoin,ethereum']
+
+
+def test_concurrent_lookups_for_one_coin_are_coalesced(app, monkeypatch):
+    """Test simultaneous cache misses for the same coin share one upstream request."""
+    import threading
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_fetch(url):
+        calls.append(url)
+        started.set()
+        release.wait(5)
+        return {'status': 'success', 'data': {'current_price': 42.0}}
+    monkeypatch.setattr(coin_service, '_fetch_coin_price', slow_fetch)
+
+    results = []
+    def lookup():
+        with app.app_context():
+            results.append(coin_service.get_coin_price('bitcoin'))
+
+    leader = threading.Thread(target=lookup)
+    leader.start()
+    assert started.wait(5)
+
+    # The leader is now blocked inside the fetch with its Future registered;
+    # note when the follower starts waiting on it before letting the fetch finish
+    pending = coin_service._inflight['bitcoin']
+    waiting = threading.Event()
+    real_result = pending.result
+    def result(timeout=None):
+        waiting.set()
+        return real_result(timeout)
+    pending.result = result
+
+    follower = threading.Thread(target=lookup)
+    follower.start()
+    assert waiting.wait(5)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert results == [42.0, 42.0]
+    assert len(calls) == 1
+
+
+def test_fetch_revalidates_with_etag(monkeypatch):
+    """Test a 304 reply reuses the body previously returned with the same ETag."""
+    coin_service._etag_cache.clear()
+    sent_headers = []
+
+    class FakeResponse:
+        def __init__(self, status_code, content=b'', headers=None):
+            self.status_code, self.content, self.headers = status_code, content, headers or {}
+
+        def raise_for_status(self):
+            pass
+
+    replies = iter([FakeResponse(200, b'{"status":"success","data":{"current_price":5}}', {'ETag': '"v1"'}),
+                    FakeResponse(304)])
+
+    def fake_get(url, timeout, headers=None):
+        sent_headers.append(headers)
+        return next(replies)
+    monkeypatch.setattr(coin_service.get_pricing_session(), 'get', fake_get)
+
+    url = 'http://pricing/api/coin/bitcoin'
+    first = coin_service._fetch_coin_price(url)
+    assert coin_service._fetch_coin_price(url) == first
+    assert sent_headers == [None, {'If-None-Match': '"v1"'}]
+    coin_service._etag_cache.clear()
+
+
+def test_get_coin_price_serves_stale_price_when_upstream_fails(app, monkeypatch):
+    """Test a recent last-known price is returned while the pricing service is down."""
+    coin_service._stale_prices.clear()
+    app.config['PRICE_STALE_TTL'] = 300
+    responses = iter([{'status': 'success', 'data': {'current_price': 60000.0}}])
+
+    def fake_fetch(url):
+        try:
+            return next(responses)
+        except StopIteration:
+            raise CircuitOpenError("Circuit 'pricing_service' is OPEN")
+    monkeypatch.setattr(coin_service, '_fetch_coin_price', fake_fetch)
+
+    assert coin_service.get_coin_price('bitcoin') == 60000.0
+    assert coin_service.get_coin_price('bitcoin') == 60000.0
+    assert coin_service.get_coin_price('ethereum') is None
+    coin_service._stale_prices.clear()
+
+
+def test_unknown_coins_do_not_open_the_circuit_or_serve_stale_prices(app, monkeypatch):
+    """Test 4xx replies return None, skip the stale fallback and leave the circuit closed."""
+    class FakeResponse:
+        def __init__(self, status_code, content=b''):
+            self.status_code, self.content, self.headers = status_code, content, {}
+
+    def fake_get(url, timeout, headers=None):
+        if url.endswith('/bitcoin'):
+            return FakeResponse(200, b'{"status":"success","data":{"current_price":5}}')
+        return FakeResponse(404)
+    monkeypatch.setattr(coin_service.get_pricing_session(), 'get', fake_get)
+    coin_service._etag_cache.clear()
+    coin_service._stale_prices.clear()
+    app.config['PRICE_STALE_TTL'] = 300
+    coin_service._stale_prices.set('delisted', 1.0, ttl=300)
+
+    for coin_id in ['delisted'] + ['unknown-%d' % i for i in range(6)]:
+        assert coin_service.get_coin_price(coin_id) is None
+    assert coin_service.get_coin_price('bitcoin') == 5
+    coin_service._stale_prices.clear()
+
+
+def test_get_coin_prices_keeps_malformed_ids_out_of_batch(app, monkeypatch):
+    """Test IDs that are not valid slugs are fetched individually, not in the batch."""
+    app.config['PRICING_BATCH_PATH'] = '/api/coins'
+    urls = []
+
+    def fake_fetch(url):
+        urls.append(url)
+        if '?ids=' in url:
+            return {'status': 'success', 'data': {'bitcoin': {'current_price': 1.0},
+                                                  'ethereum': {'current_price': 2.0}}}
+        return {'status': 'success', 'data': {'current_price': 3.0}}
+    monkeypatch.setattr(coin_service, '_fetch_coin_price', fake_fetch)
+
+    prices = coin_service.get_coin_prices(['bitcoin', 'ethereum', 'Bad Coin'])
+
+    assert prices == {'bitcoin': 1.0, 'ethereum': 2.0, 'Bad Coin': 3.0}
+    assert urls[0].endswith('?ids=bitcoin,ethereum')
+    assert len(urls) == 2
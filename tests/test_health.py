@@ -18,3 +18,17 @@ def test_readiness_endpoint(client):
     data = response.get_json()
     assert data['status'] == 'ok'
     assert data['detail'] == 'service ready'
+
+
+def test_no_rule_uses_strict_slashes(monkeypatch):
+    """Test blueprint and Swagger routes all match with or without a trailing slash."""
+    import app as app_module
+    config = dict(app_module._config_for('testing'), ENABLE_SWAGGER=True)
+    monkeypatch.setattr(app_module, '_config_for', lambda env: config)
+    monkeypatch.setenv('FLASK_ENV', 'testing')
+
+    flask_app = app_module.create_app()
+
+    rules = [rule for rule in flask_app.url_map.iter_rules() if rule.endpoint != 'static']
+    assert any(rule.endpoint.startswith('flasgger') for rule in rules)
+    assert [rule.rule for rule in rules if rule.strict_slashes] == []
@@ -0,0 +1,76 @@
+"""Tests for push notification delivery."""
+import pytest
+
+from app.services import push_service
+from app.utils.resilience import CircuitOpenError
+
+
+def test_push_circuit_is_per_gateway(monkeypatch):
+    """Test a failing push gateway opens only its own circuit."""
+    monkeypatch.setattr(push_service, '_breakers', {})
+    monkeypatch.setattr('app.utils.resilience.time.sleep', lambda seconds: None)
+
+    class FakeResponse:
+        def __init__(self, status_code):
+            self.status_code = status_code
+
+    monkeypatch.setattr(push_service.session, 'post', lambda endpoint, **kwargs: FakeResponse(
+        503 if endpoint.startswith('https://down.example') else 201))
+
+    for _ in range(3):
+        with pytest.raises(Exception):
+            push_service._send_push_to_endpoint('https://down.example/a', b'{}')
+    with pytest.raises(CircuitOpenError):
+        push_service._send_push_to_endpoint('https://down.example/b', b'{}')
+    assert push_service._send_push_to_endpoint('https://up.example/a', b'{}') == 201
+
+
+def test_bulk_send_reports_per_user_delivery(app, monkeypatch):
+    """Test a bulk send reaches every user's devices and reports who got it."""
+    sent = []
+    monkeypatch.setattr(push_service, '_send_push_to_endpoint',
+                        lambda endpoint, payload: sent.append(endpoint) or (503 if 'bad' in endpoint else 201))
+    push_service.subscribe_to_push('alice', {'endpoint': 'https://push/alice-1'})
+    push_service.subscribe_to_push('alice', {'endpoint': 'https://push/alice-2'})
+    push_service.subscribe_to_push('bob', {'endpoint': 'https://push/bob-bad'})
+
+    results = push_service.send_push_notifications_bulk(['alice', 'bob', 'carol'], 'BTC', 'moved')
+
+    assert results == {'alice': True, 'bob': False, 'carol': False}
+    assert sorted(sent) == ['https://push/alice-1', 'https://push/alice-2', 'https://push/bob-bad']
+
+
+def test_malformed_subscriptions_are_deactivated(app, monkeypatch):
+    """Test subscriptions without a usable endpoint are skipped and deactivated."""
+    from app.extensions import db
+    from app.models import PushSubscription
+    sent = []
+    monkeypatch.setattr(push_service, '_send_push_to_endpoint',
+                        lambda endpoint, payload: sent.append(endpoint) or 201)
+    push_service.subscribe_to_push('alice', {'endpoint': 'https://push/alice'})
+    push_service.subscribe_to_push('alice', {'keys': {}})
+    db.session.add(PushSubscription(user_id='alice', subscription_data='not json'))
+    db.session.commit()
+
+    assert push_service.send_push_notification('alice', 'title', 'body') is True
+    assert sent == ['https://push/alice']
+    assert PushSubscription.query.filter_by(is_active=True).count() == 1
+
+
+def test_deactivation_counts_only_changed_rows(app, monkeypatch):
+    """Test already-inactive or unknown IDs are neither counted nor invalidated."""
+    from app.extensions import db
+    from app.models import PushSubscription
+    active = push_service.subscribe_to_push('alice', {'endpoint': 'https://push/a'})
+    inactive = PushSubscription(user_id='bob', subscription_data='{}', is_active=False)
+    db.session.add(inactive)
+    db.session.commit()
+    monkeypatch.setattr(push_service, '_endpoints_cache', push_service.TTLCache())
+    push_service._endpoints_cache.set('bob', [])
+    logged = []
+    monkeypatch.setattr(push_service.logger, 'info', lambda msg, *args: logged.append(args))
+
+    push_service._deactivate_subscriptions({active.id, inactive.id, 'missing'})
+
+    assert logged == [(1,)]
+    assert push_service._endpoints_cache.get('bob') == []
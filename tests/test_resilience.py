@@ -0,0 +1,156 @@
+"""Tests for the circuit breaker and retry helpers."""
+import pytest
+
+from app.utils.resilience import CircuitBreaker, CircuitOpenError, CircuitState, retry
+
+
+def _fail():
+    raise RuntimeError('upstream down')
+
+
+def _open_breaker(monkeypatch, **kwargs):
+    clock = [1000.0]
+    monkeypatch.setattr('app.utils.resilience.time.monotonic', lambda: clock[0])
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, name='test', **kwargs)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            breaker.call(_fail)
+    assert breaker.state == CircuitState.OPEN
+    clock[0] += 10
+    return breaker
+
+
+def test_half_open_needs_success_threshold_to_close(monkeypatch):
+    """Test a recovering circuit closes only after enough successful trials."""
+    breaker = _open_breaker(monkeypatch, success_threshold=2)
+
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == CircuitState.HALF_OPEN
+    breaker.call(lambda: 'ok')
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_half_open_failure_reopens(monkeypatch):
+    """Test any failed trial call sends the circuit back to OPEN."""
+    breaker = _open_breaker(monkeypatch)
+
+    breaker.call(lambda: 'ok')
+    with pytest.raises(RuntimeError):
+        breaker.call(_fail)
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError, match='is OPEN'):
+        breaker.call(lambda: 'ok')
+
+
+def test_half_open_limits_concurrent_trial_calls(monkeypatch):
+    """Test callers beyond half_open_max_calls are rejected while trials are in flight."""
+    breaker = _open_breaker(monkeypatch, success_threshold=3, half_open_max_calls=2)
+
+    with pytest.raises(Exception, match='trial limit'):
+        breaker.call(lambda: breaker.call(lambda: breaker.call(lambda: 'ok')))
+
+
+def test_ignored_errors_do_not_open_the_circuit():
+    """Test exceptions matched by ignore are re-raised without counting as failures."""
+    def reject():
+        raise ValueError('bad request')
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, name='test',
+                             ignore=lambda e: isinstance(e, ValueError))
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            breaker.call(reject)
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.failure_count == 0
+
+
+def test_closed_failures_must_be_consecutive():
+    """Test a success in CLOSED resets the failure count."""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, name='test')
+    with pytest.raises(RuntimeError):
+        breaker.call(_fail)
+    breaker.call(lambda: 'ok')
+    with pytest.raises(RuntimeError):
+        breaker.call(_fail)
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_retry_only_retries_matching_errors(monkeypatch):
+    """Test retry backs off on retry_on errors and raises others immediately."""
+    sleeps = []
+    monkeypatch.setattr('app.utils.resilience.time.sleep', sleeps.append)
+    calls = []
+
+    @retry(max_attempts=3, delay=1, max_delay=1.5, jitter=False, retry_on=(ConnectionError,),
+           giveup=lambda e: 'fatal' in str(e))
+    def flaky(error):
+        calls.append(error)
+        raise error
+
+    with pytest.raises(ConnectionError):
+        flaky(ConnectionError('reset'))
+    assert sleeps == [1, 1.5]
+
+    for error in (ValueError('bad'), ConnectionError('fatal')):
+        calls.clear()
+        with pytest.raises(type(error)):
+            flaky(error)
+        assert len(calls) == 1
+
+
+def test_concurrent_failures_open_the_circuit():
+    """Test failures racing from many threads trip the breaker and then stop reaching upstream."""
+    import threading
+    breaker = CircuitBreaker(failure_threshold=50, recovery_timeout=60, name='test')
+    start = threading.Barrier(8)
+    executed = []
+
+    def failing():
+        executed.append(1)
+        raise RuntimeError('upstream down')
+
+    def hammer():
+        start.wait()
+        for _ in range(25):
+            try:
+                breaker.call(failing)
+            except Exception:
+                pass
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert breaker.state == CircuitState.OPEN
+    # Only calls already admitted when it tripped (at most one per other thread) get through
+    assert 50 <= len(executed) <= 57
+
+
+def test_retry_jitters_delays_by_default(monkeypatch):
+    """Test default retries sleep within 50-150% of each backoff step."""
+    sleeps = []
+    monkeypatch.setattr('app.utils.resilience.time.sleep', sleeps.append)
+
+    @retry(max_attempts=3, delay=1)
+    def failing():
+        raise ConnectionError('reset')
+
+    with pytest.raises(ConnectionError):
+        failing()
+    assert 0.5 <= sleeps[0] <= 1.5 and 1 <= sleeps[1] <= 3
+
+
+def test_retry_fails_fast_on_open_circuit(monkeypatch):
+    """Test an open circuit is raised straight through retry without sleeping."""
+    sleeps = []
+    monkeypatch.setattr('app.utils.resilience.time.sleep', sleeps.append)
+    breaker = _open_breaker(monkeypatch)
+    breaker.last_failure_time += 10
+
+    @retry(max_attempts=3, delay=1)
+    def guarded():
+        return breaker.call(lambda: 'ok')
+
+    with pytest.raises(CircuitOpenError):
+        guarded()
+    assert sleeps == []
@@ -0,0 +1,29 @@
+"""Tests for the orjson-backed JSON helpers."""
+import pytest
+
+
+def test_json_provider_honours_sort_keys_and_compact(app):
+    """Test jsonify follows the provider's sort_keys and compact settings."""
+    app.json.compact = True
+    with app.test_request_context():
+        assert app.json.dumps({'b': 1, 'a': 2}) == '{"a":2,"b":1}'
+        assert app.json.response({'b': 1, 'a': 2}).get_data() == b'{"a":2,"b":1}'
+        
+        app.json.sort_keys = False
+        app.json.compact = False
+        body = app.json.response({'b': 1, 'a': 2}).get_data()
+    assert body == b'{\n  "b": 1,\n  "a": 2\n}\n'
+
+
+def test_json_provider_passes_default_through(app):
+    """Test a caller's default= is used for types orjson can't encode."""
+    assert app.json.dumps({'a': {1, 2}}, default=sorted) == '{"a":[1,2]}'
+
+
+def test_json_provider_rejects_unsupported_arguments(app):
+    """Test json.dumps arguments orjson has no equivalent for raise instead of being dropped."""
+    assert app.json.dumps({'a': 1}, separators=(',', ':')) == '{"a":1}'
+    with pytest.raises(TypeError, match='separators'):
+        app.json.dumps({'a': 1}, separators=(', ', ': '))
+    with pytest.raises(TypeError, match='ensure_ascii'):
+        app.json.dumps({'a': 1}, ensure_ascii=True)